@@ -0,0 +1,69 @@
+"""
+ASGI config for foodgram project.
+
+It exposes the ASGI callable as a module-level variable named ``application``.
+
+Django 2.2 has no native ASGI handler, so the WSGI application is run
+through asgiref's WSGI adapter in a thread pool: the event loop keeps
+serving slow clients and streaming responses while views run in threads.
+"""
+
+import os
+
+from asgiref.sync import sync_to_async
+from asgiref.wsgi import WsgiToAsgi, WsgiToAsgiInstance
+from django.core.wsgi import get_wsgi_application
+from foodgram.warmup import import_app_modules
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'foodgram.settings')
+
+
+class ThreadPoolWsgiToAsgiInstance(WsgiToAsgiInstance):
+    # By default asgiref runs every request in a single shared thread.
+    @sync_to_async(thread_sensitive=False)
+    def run_wsgi_app(self, body):
+        """
+        Выполняет WSGI-приложение в потоке и отправляет ответ клиенту.
+
+        В отличие от asgiref, всегда вызывает close() у ответа: Django
+        шлёт по нему request_finished (закрытие соединений с БД), а
+        потоковые ответы освобождают занятые ресурсы.
+        """
+        environ = self.build_environ(self.scope, body)
+        response = self.wsgi_application(environ, self.start_response)
+        try:
+            bytes_sent = 0
+            for output in response:
+                if not self.response_started:
+                    self.response_started = True
+                    self.sync_send(self.response_start)
+                if self.response_content_length is not None:
+                    bytes_allowed = self.response_content_length - bytes_sent
+                    output = output[:bytes_allowed]
+                self.sync_send({
+                    'type': 'http.response.body',
+                    'body': output,
+                    'more_body': True,
+                })
+                bytes_sent += len(output)
+                if bytes_sent == self.response_content_length:
+                    break
+            if not self.response_started:
+                self.response_started = True
+                self.sync_send(self.response_start)
+            self.sync_send({'type': 'http.response.body'})
+        finally:
+            close = getattr(response, 'close', None)
+            if close is not None:
+                close()
+
+
+class ThreadPoolWsgiToAsgi(WsgiToAsgi):
+    async def __call__(self, scope, receive, send):
+        await ThreadPoolWsgiToAsgiInstance(self.wsgi_application)(
+            scope, receive, send)
+
+
+application = ThreadPoolWsgiToAsgi(get_wsgi_application())
+
+import_app_modules()
@@ -0,0 +1,90 @@
+import hashlib
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+
+REPLICA = 'replica'
+PRIMARY = 'default'
+STICKY_COOKIE = 'primary_until'
+STICKY_KEY = 'primary_until:{}'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+use_replica = ContextVar('use_replica', default=False)
+
+
+@contextmanager
+def primary():
+    """Направляет чтение внутри блока на основную БД.
+    Используется там, где прочитанное попадает в общий кэш"""
+    token = use_replica.set(False)
+    try:
+        yield
+    finally:
+        use_replica.reset(token)
+
+
+class ReplicaRouter:
+    """Отправляет чтение на реплику, если ее разрешил ReplicaMiddleware,
+    а запись и все остальное на основную БД"""
+    def db_for_read(self, model, **hints):
+        if use_replica.get() and REPLICA in settings.DATABASES:
+            return REPLICA
+        return PRIMARY
+
+    def db_for_write(self, model, **hints):
+        use_replica.set(False)
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == PRIMARY
+
+
+class ReplicaMiddleware:
+    """Разрешает чтение с реплики для безопасных запросов. После записи
+    клиент REPLICA_STICKY_SECONDS секунд читает с основной БД, чтобы
+    видеть свои изменения: по cookie и по токену авторизации"""
+    def __init__(self, get_response):
+        if REPLICA not in settings.DATABASES:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def get_sticky_key(self, request):
+        authorization = request.META.get('HTTP_AUTHORIZATION')
+        if not authorization:
+            return None
+        return STICKY_KEY.format(
+            hashlib.md5(authorization.encode()).hexdigest())
+
+    def is_sticky(self, request, sticky_key):
+        now = time.time()
+        try:
+            if float(request.COOKIES.get(STICKY_COOKIE, 0)) > now:
+                return True
+        except ValueError:
+            pass
+        return sticky_key is not None and cache.get(sticky_key, 0) > now
+
+    def __call__(self, request):
+        sticky_key = self.get_sticky_key(request)
+        is_safe = request.method in SAFE_METHODS
+        token = use_replica.set(
+            is_safe and not self.is_sticky(request, sticky_key))
+        try:
+            response = self.get_response(request)
+        finally:
+            use_replica.reset(token)
+        if not is_safe and response.status_code < 400:
+            until = time.time() + settings.REPLICA_STICKY_SECONDS
+            response.set_cookie(
+                STICKY_COOKIE, str(until),
+                max_age=settings.REPLICA_STICKY_SECONDS, httponly=True)
+            if sticky_key is not None:
+                cache.set(sticky_key, until, settings.REPLICA_STICKY_SECONDS)
+        return response
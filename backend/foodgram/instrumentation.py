@@ -0,0 +1,141 @@
+import json
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+logger = logging.getLogger('foodgram.slow_requests')
+
+SQL_LITERAL_RE = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+SQL_IN_LIST_RE = re.compile(r'\((?:\s*\?\s*,)*\s*\?\s*\)')
+
+request_timings = ContextVar('request_timings', default=None)
+
+
+class RequestTimings:
+    """Замеры одного запроса"""
+    def __init__(self):
+        self.queries = []
+        self.serializer_time = 0
+        self.serializer_depth = 0
+        self.render_started = None
+        self.render_time = 0
+
+    def execute(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append((sql, time.perf_counter() - started))
+
+    @property
+    def db_time(self):
+        return sum(duration for _, duration in self.queries)
+
+    def get_repeated_queries(self):
+        """Повторяющиеся с точностью до параметров запросы (N+1)"""
+        patterns = Counter(
+            SQL_IN_LIST_RE.sub('(...)', SQL_LITERAL_RE.sub(
+                '?', sql.replace('%s', '?')))
+            for sql, _ in self.queries
+        )
+        return [
+            {'sql': sql, 'count': count}
+            for sql, count in patterns.most_common()
+            if count >= settings.N_PLUS_ONE_THRESHOLD
+        ]
+
+    def get_slowest_queries(self):
+        return [
+            {'sql': sql, 'ms': round(duration * 1000, 2)}
+            for sql, duration in sorted(
+                self.queries, key=lambda query: query[1], reverse=True
+            )[:settings.SLOW_REQUEST_TOP_QUERIES]
+        ]
+
+
+class TimedRepresentationMixin:
+    """Учитывает время сериализации во времени запроса.
+    Вложенные сериализаторы не учитываются повторно"""
+    def to_representation(self, instance):
+        timings = request_timings.get()
+        if timings is None:
+            return super().to_representation(instance)
+        timings.serializer_depth += 1
+        started = time.perf_counter()
+        try:
+            return super().to_representation(instance)
+        finally:
+            timings.serializer_depth -= 1
+            if not timings.serializer_depth:
+                timings.serializer_time += time.perf_counter() - started
+
+
+class ServerTimingMiddleware:
+    """Добавляет к ответу заголовок Server-Timing с числом и временем
+    SQL-запросов, временем сериализации и рендеринга и размером ответа,
+    а медленные запросы пишет в лог foodgram.slow_requests"""
+    def __init__(self, get_response):
+        if not settings.SERVER_TIMING:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timings = RequestTimings()
+        token = request_timings.set(timings)
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(timings.execute))
+                response = self.get_response(request)
+        finally:
+            request_timings.reset(token)
+        total = time.perf_counter() - started
+        size = (None if response.streaming else len(response.content))
+        response['Server-Timing'] = ', '.join(
+            f'{name};dur={duration * 1000:.2f}' + (
+                f';desc="{desc}"' if desc else '')
+            for name, duration, desc in (
+                ('db', timings.db_time, f'{len(timings.queries)} queries'),
+                ('serializer', timings.serializer_time, ''),
+                ('render', timings.render_time, ''),
+                ('total', total, f'{size} bytes' if size is not None else ''),
+            )
+        )
+        if total >= settings.SLOW_REQUEST_THRESHOLD:
+            self.log_slow_request(request, response, timings, total, size)
+        return response
+
+    def process_template_response(self, request, response):
+        timings = request_timings.get()
+        if timings is not None:
+            timings.render_started = time.perf_counter()
+            response.add_post_render_callback(
+                lambda rendered: self.render_finished(timings))
+        return response
+
+    def render_finished(self, timings):
+        timings.render_time += time.perf_counter() - timings.render_started
+
+    def log_slow_request(self, request, response, timings, total, size):
+        logger.warning(json.dumps({
+            'method': request.method,
+            'path': request.get_full_path(),
+            'status': response.status_code,
+            'ms': round(total * 1000, 2),
+            'db_ms': round(timings.db_time * 1000, 2),
+            'serializer_ms': round(timings.serializer_time * 1000, 2),
+            'render_ms': round(timings.render_time * 1000, 2),
+            'queries': len(timings.queries),
+            'size': size,
+            'slowest_queries': timings.get_slowest_queries(),
+            'repeated_queries': timings.get_repeated_queries(),
+        }, ensure_ascii=False))
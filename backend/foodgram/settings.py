@@ -28,6 +28,9 @@ DEBUG = strtobool(os.getenv('DEBUG', default='True'))
 
 ALLOWED_HOSTS = ['*']
 
+# Адрес сайта, под которым отвечает API (используется для прогрева кэша)
+SITE_URL = os.getenv('SITE_URL', default='http://localhost')
+
 
 # Application definition
 
@@ -48,9 +51,12 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'foodgram.instrumentation.ServerTimingMiddleware',
+    'foodgram.db_router.ReplicaMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
+    'django.middleware.http.ConditionalGetMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
@@ -90,9 +96,59 @@ DATABASES = {
         'PASSWORD': os.getenv('POSTGRES_PASSWORD', default='postgres'),
         'HOST': os.getenv('DB_HOST', default='db'),
         'PORT': os.getenv('DB_PORT', default='5432'),
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', default='0')),
     }
 }
 
+if os.getenv('DB_REPLICA_HOST') or os.getenv('DB_REPLICA_NAME'):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'NAME': os.getenv('DB_REPLICA_NAME', default=DATABASES['default']['NAME']),
+        'HOST': os.getenv('DB_REPLICA_HOST', default=DATABASES['default']['HOST']),
+        'PORT': os.getenv('DB_REPLICA_PORT', default=DATABASES['default']['PORT']),
+        'CONN_MAX_AGE': int(os.getenv('DB_REPLICA_CONN_MAX_AGE', default=DATABASES['default']['CONN_MAX_AGE'])),
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['foodgram.db_router.ReplicaRouter']
+
+REPLICA_STICKY_SECONDS = int(os.getenv('REPLICA_STICKY_SECONDS', default='10'))
+
+# Кэш общий для backend и воркеров: через него рассылаются версии
+# справочников, рецептов и токенов. Без REDIS_URL используется файловый
+# кэш, видимый только процессам одного контейнера (для разработки).
+# Глобальные версии хранятся в отдельном кэше versions, который
+# не вытесняет записи.
+REDIS_URL = os.getenv('REDIS_URL')
+
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django_redis.cache.RedisCache',
+            'LOCATION': REDIS_URL,
+        },
+        'versions': {
+            'BACKEND': 'django_redis.cache.RedisCache',
+            'LOCATION': REDIS_URL,
+        },
+    }
+else:
+    CACHE_LOCATION = os.getenv('CACHE_LOCATION', default='/tmp/foodgram_cache')
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': CACHE_LOCATION,
+            'OPTIONS': {
+                'MAX_ENTRIES': int(
+                    os.getenv('CACHE_MAX_ENTRIES', default='20000')),
+            },
+        },
+        'versions': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.path.join(CACHE_LOCATION, 'versions'),
+        },
+    }
+
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
 
@@ -140,14 +196,21 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'users.authentication.CachedTokenAuthentication',
     ],
     'DEFAULT_FILTER_BACKENDS': [
         'django_filters.rest_framework.DjangoFilterBackend',
     ],
     'DEFAULT_PAGINATION_CLASS':
-        'rest_framework.pagination.PageNumberPagination',
+        'recipes.paginator.PageNumberOrCursorPaginator',
     'PAGE_SIZE': 6,
+    'DEFAULT_THROTTLE_RATES': {
+        'recipe_write': os.getenv('THROTTLE_RECIPE_WRITE', default='20/min'),
+        'favorite': os.getenv('THROTTLE_FAVORITE', default='60/min'),
+        'shopping_cart': os.getenv('THROTTLE_SHOPPING_CART', default='60/min'),
+        'subscribe': os.getenv('THROTTLE_SUBSCRIBE', default='30/min'),
+        'export': os.getenv('THROTTLE_EXPORT', default='10/min'),
+    },
 }
 
 DJOSER = {
@@ -168,3 +231,79 @@ DJOSER = {
 AUTH_USER_MODEL = 'users.User'
 
 RECIPES_LIMIT = 10
+
+MAX_PAGE_SIZE = 100
+
+RECIPE_IMAGE_VARIANTS = {
+    'card': 480,
+    'detail': 960,
+    'retina': 1920,
+}
+
+INGREDIENTS_SEARCH_LIMIT = 50
+
+# Шрифт TrueType с кириллицей, встраиваемый в список покупок в pdf
+SHOPPING_LIST_PDF_FONT = os.getenv(
+    'SHOPPING_LIST_PDF_FONT',
+    default='/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf')
+
+CATALOG_CHECK_INTERVAL = 1
+
+RESPONSE_CACHE_TIMEOUT = 600
+
+RECIPE_TAGS_BITMASK = strtobool(os.getenv('RECIPE_TAGS_BITMASK', default='True'))
+
+FEED_MAX_LENGTH = 500
+
+FEED_FANOUT_MAX_FOLLOWERS = 10000
+
+FEED_FANOUT_BATCH_SIZE = 1000
+
+# Задержка перед повтором упавшей фоновой задачи, удваивается с каждой попыткой
+JOB_RETRY_DELAY = 10
+
+AUTH_TOKEN_CACHE_SIZE = 10000
+
+AUTH_TOKEN_CACHE_TTL = 300
+
+AUTH_TOKEN_CHECK_INTERVAL = 1
+
+SERVER_TIMING = strtobool(os.getenv('SERVER_TIMING', default='False'))
+
+SLOW_REQUEST_THRESHOLD = float(os.getenv('SLOW_REQUEST_THRESHOLD', default='0.5'))
+
+SLOW_REQUEST_TOP_QUERIES = 5
+
+N_PLUS_ONE_THRESHOLD = 3
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'message': {'format': '%(message)s'},
+    },
+    'handlers': {
+        'slow_requests': {
+            'class': 'logging.StreamHandler',
+            'formatter': 'message',
+        },
+    },
+    'loggers': {
+        'foodgram.slow_requests': {
+            'handlers': ['slow_requests'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+    },
+}
+
+USER_RELATIONS_TIMEOUT = 3600
+
+LOAD_SHEDDING_LIMITS = {
+    'export': int(os.getenv('LOAD_SHEDDING_EXPORT', default='4')),
+    'image_upload': int(os.getenv('LOAD_SHEDDING_IMAGE_UPLOAD', default='8')),
+}
+
+LOAD_SHEDDING_RETRY_AFTER = 5
+
+LOAD_SHEDDING_SLOT_TIMEOUT = 300
@@ -0,0 +1,24 @@
+from importlib import import_module
+from importlib.util import find_spec
+
+from django.apps import apps
+from django.conf import settings
+from django.urls import get_resolver
+
+APP_MODULES = ('admin', 'filters', 'serializers', 'views', 'urls')
+
+
+def import_app_modules():
+    """Импортирует модули приложений проекта и URLconf заранее,
+    чтобы за импорт не платил первый запрос"""
+    imported = []
+    for app_config in apps.get_app_configs():
+        if not app_config.path.startswith(str(settings.BASE_DIR)):
+            continue
+        for name in APP_MODULES:
+            module = f'{app_config.name}.{name}'
+            if find_spec(module) is not None:
+                import_module(module)
+                imported.append(module)
+    get_resolver().url_patterns
+    return imported
@@ -2,7 +2,18 @@
 # Файл для оптимизации работы Docker файла
 # Что бы каждый раз в ручную не делать миграции,
 # подтягивать статику и подгружать список рецептов
-python manage.py migrate --noinput && \
-python manage.py collectstatic --no-input && \
-python manage.py data_loading && \
-gunicorn foodgram.wsgi:application --bind 0:8000
\ No newline at end of file
+# Шаги пропускаются, если ничего не изменилось, BOOT_WARM=1 прогревает кэш
+# (любое другое значение — нет),
+# --preload импортирует приложение один раз до запуска воркеров
+# SERVER_MODE=asgi запускает gunicorn с uvicorn-воркерами
+BOOT_ARGS=""
+if [ "$BOOT_WARM" = "1" ]; then
+    BOOT_ARGS="--warm"
+fi
+python manage.py boot $BOOT_ARGS && \
+if [ "$SERVER_MODE" = "asgi" ]; then
+    gunicorn foodgram.asgi:application --bind 0:8000 --preload \
+        --worker-class uvicorn.workers.UvicornWorker
+else
+    gunicorn foodgram.wsgi:application --bind 0:8000 --preload
+fi
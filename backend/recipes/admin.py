@@ -10,6 +10,7 @@ class RecipeIngredientsInline(admin.TabularInline):
     model = RecipeIngredient
     min_num = 1
     extra = 1
+    autocomplete_fields = ('ingredient',)
 
 
 class RecipeTagsInline(admin.TabularInline):
@@ -24,18 +25,23 @@ class RecipeTagsInline(admin.TabularInline):
 class RecipeAdmin(admin.ModelAdmin):
     """Параметры админ зоны рецептов."""
     list_display = ('pk', 'name', 'author', 'favorite')
-    list_filter = ('name', 'author', 'tags')
+    list_filter = ('tags',)
+    list_select_related = ('author',)
+    search_fields = ('name', 'author__username', 'author__email')
+    autocomplete_fields = ('author',)
+    show_full_result_count = False
     inlines = (RecipeIngredientsInline, RecipeTagsInline)
 
     def favorite(self, obj):
-        return obj.favorite.all().count()
+        return obj.favorites_count
+    favorite.admin_order_field = 'favorites_count'
 
 
 @admin.register(Ingredient)
 class IngredientAdmin(admin.ModelAdmin):
     """Параметры админ зоны продуктов."""
     list_display = ('pk', 'name', 'measurement_unit',)
-    list_filter = ('name',)
+    list_filter = ('measurement_unit',)
     search_fields = ('name',)
 
 
@@ -49,9 +55,17 @@ class TagAdmin(admin.ModelAdmin):
 class FavoriteAdmin(admin.ModelAdmin):
     """Параметры админ зоны избранных рецептов."""
     list_display = ('pk', 'user', 'recipe')
+    list_select_related = ('user', 'recipe')
+    autocomplete_fields = ('user', 'recipe')
+    search_fields = ('user__username', 'recipe__name')
+    show_full_result_count = False
 
 
 @admin.register(ShoppingCart)
 class ShoppingCartAdmin(admin.ModelAdmin):
     """Параметры админ зоны продуктовой корзины."""
     list_display = ('pk', 'user', 'recipe')
+    list_select_related = ('user', 'recipe')
+    autocomplete_fields = ('user', 'recipe')
+    search_fields = ('user__username', 'recipe__name')
+    show_full_result_count = False
@@ -0,0 +1,88 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.db import transaction
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, urlencode
+from foodgram.db_router import primary
+
+RECIPES_VERSION_KEY = 'recipes_version'
+
+
+def get_recipes_version():
+    """Возвращает время последнего изменения рецептов и тегов
+    в микросекундах"""
+    versions = caches['versions']
+    version = versions.get(RECIPES_VERSION_KEY)
+    if version is None:
+        # Новая версия больше всех прежних, даже если ключ был потерян.
+        version = time.time_ns() // 1000
+        if not versions.add(RECIPES_VERSION_KEY, version, None):
+            version = versions.get(RECIPES_VERSION_KEY)
+    return version
+
+
+def bump_recipes_version():
+    """Сбрасывает кэш ответов после фиксации транзакции"""
+    transaction.on_commit(lambda: caches['versions'].set(
+        RECIPES_VERSION_KEY,
+        max(time.time_ns() // 1000, get_recipes_version() + 1),
+        None
+    ))
+
+
+class CachedReadMixin:
+    """Отдает анонимным пользователям list и retrieve из кэша ответов
+    с поддержкой If-None-Match и If-Modified-Since"""
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(
+            super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(
+            super().retrieve, request, *args, **kwargs)
+
+    def get_response_cache_key(self, request, version):
+        query = urlencode(sorted(
+            (key, sorted(values))
+            for key, values in request.query_params.lists()
+        ), doseq=True)
+        # Хост и схема входят в ключ: ответы содержат абсолютные ссылки.
+        path = hashlib.md5(
+            f'{request.scheme}://{request.get_host()}{request.path}?{query}'
+            .encode()).hexdigest()
+        return (f'response:{version}:{request.accepted_renderer.format}:'
+                f'{path}')
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        if not request.user.is_anonymous:
+            return handler(request, *args, **kwargs)
+        version = get_recipes_version()
+        key = self.get_response_cache_key(request, version)
+        etag = f'"{hashlib.md5(key.encode()).hexdigest()}"'
+        last_modified = version // 10 ** 6
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified)
+        if response is None:
+            cached = cache.get(key)
+            if cached is not None:
+                content, content_type = cached
+                response = HttpResponse(content, content_type=content_type)
+            else:
+                with primary():
+                    response = self.finalize_response(
+                        request, handler(request, *args, **kwargs),
+                        *args, **kwargs
+                    )
+                if response.status_code != 200:
+                    return response
+                response.render()
+                cache.set(key, (response.content, response['Content-Type']),
+                          settings.RESPONSE_CACHE_TIMEOUT)
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        patch_vary_headers(response, ('Authorization',))
+        return response
@@ -0,0 +1,128 @@
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from foodgram.db_router import primary
+
+from .models import Ingredient, Tag
+
+CATALOG_VERSION_KEY = 'catalog_version'
+
+
+def get_catalog_version():
+    """Возвращает текущую версию справочников тегов и ингредиентов"""
+    versions = caches['versions']
+    version = versions.get(CATALOG_VERSION_KEY)
+    if version is None:
+        version = uuid.uuid4().hex
+        if not versions.add(CATALOG_VERSION_KEY, version, None):
+            version = versions.get(CATALOG_VERSION_KEY)
+    return version
+
+
+def bump_catalog_version():
+    """Помечает справочники устаревшими во всех процессах
+    после фиксации транзакции"""
+    def bump():
+        caches['versions'].set(CATALOG_VERSION_KEY, uuid.uuid4().hex, None)
+        catalog.invalidate()
+    transaction.on_commit(bump)
+
+
+class Catalog:
+    """Кэш справочников тегов и ингредиентов в памяти процесса.
+    Перезагружается при смене версии в общем кэше, которая
+    проверяется не чаще раза в CATALOG_CHECK_INTERVAL секунд"""
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.version = None
+        self.checked_at = 0
+        self.tags = []
+        self.tags_by_id = {}
+        self.tags_by_slug = {}
+        self.ingredients = []
+        self.ingredients_by_id = {}
+
+    def invalidate(self):
+        self.version = None
+
+    def load(self, version):
+        tags = list(Tag.objects.all())
+        ingredients = list(Ingredient.objects.all())
+        self.tags = tags
+        self.tags_by_id = {tag.id: tag for tag in tags}
+        self.tags_by_slug = {tag.slug: tag for tag in tags}
+        self.ingredients = ingredients
+        self.ingredients_by_id = {
+            ingredient.id: ingredient for ingredient in ingredients
+        }
+        self.version = version
+
+    def refresh(self):
+        """Перезагружает справочники, если они изменились,
+        и возвращает их версию"""
+        now = time.monotonic()
+        if (self.version is not None
+                and now - self.checked_at < settings.CATALOG_CHECK_INTERVAL):
+            return self.version
+        version = get_catalog_version()
+        self.checked_at = now
+        if version != self.version:
+            with self.lock, primary():
+                if version != self.version:
+                    self.load(version)
+        return version
+
+    def get_tags(self):
+        """Возвращает все теги, отсортированные по названию"""
+        self.refresh()
+        return self.tags
+
+    def get_tag(self, tag_id):
+        self.refresh()
+        return self.tags_by_id.get(tag_id)
+
+    def get_tags_by_ids(self, tag_ids):
+        """Возвращает теги с указанными id, отсортированные по названию"""
+        tag_ids = set(tag_ids)
+        return [tag for tag in self.get_tags() if tag.id in tag_ids]
+
+    def get_tag_ids_by_slugs(self, slugs):
+        self.refresh()
+        return [
+            self.tags_by_slug[slug].id
+            for slug in slugs if slug in self.tags_by_slug
+        ]
+
+    def get_tag_choices(self):
+        return [(tag.slug, tag.name) for tag in self.get_tags()]
+
+    def tags_in_bulk(self, tag_ids):
+        """Аналог Tag.objects.in_bulk, обращающийся к БД
+        только за отсутствующими в кэше тегами"""
+        self.refresh()
+        return self.in_bulk(Tag, self.tags_by_id, tag_ids)
+
+    def get_ingredients(self):
+        """Возвращает все ингредиенты, отсортированные по названию"""
+        self.refresh()
+        return self.ingredients
+
+    def ingredients_in_bulk(self, ingredient_ids):
+        """Аналог Ingredient.objects.in_bulk, обращающийся к БД
+        только за отсутствующими в кэше ингредиентами"""
+        self.refresh()
+        return self.in_bulk(Ingredient, self.ingredients_by_id, ingredient_ids)
+
+    def in_bulk(self, model, objects_by_id, ids):
+        found = {pk: objects_by_id[pk] for pk in ids if pk in objects_by_id}
+        missing = [pk for pk in ids if pk not in found]
+        if missing:
+            found.update(model.objects.in_bulk(missing))
+        return found
+
+
+catalog = Catalog()
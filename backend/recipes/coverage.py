@@ -0,0 +1,170 @@
+import bisect
+import threading
+import uuid
+from array import array
+from collections import Counter, defaultdict
+
+from django.core.cache import caches
+from django.db import transaction
+from foodgram.db_router import primary
+
+from .models import RecipeIngredient
+
+COVERAGE_GENERATION_KEY = 'coverage_generation'
+COVERAGE_COUNTER_KEY = 'coverage_counter:{}'
+COVERAGE_CHANGE_KEY = 'coverage_change:{}:{}'
+COVERAGE_MAX_CHANGES = 500
+COVERAGE_CHANGE_TIMEOUT = 24 * 3600
+
+
+def get_coverage_version():
+    """Возвращает (поколение, номер последнего изменения) журнала
+    изменений ингредиентов рецептов. Если счетчик потерян, начинается
+    новое поколение, и все процессы перестраивают индекс целиком"""
+    versions = caches['versions']
+    generation = versions.get(COVERAGE_GENERATION_KEY)
+    if generation is not None:
+        counter = versions.get(COVERAGE_COUNTER_KEY.format(generation))
+        if counter is not None:
+            return generation, counter
+    return reset_coverage()
+
+
+def reset_coverage():
+    """Начинает новое поколение журнала: индекс перестроится целиком"""
+    versions = caches['versions']
+    generation = uuid.uuid4().hex
+    versions.set(COVERAGE_COUNTER_KEY.format(generation), 0, None)
+    versions.set(COVERAGE_GENERATION_KEY, generation, None)
+    return generation, 0
+
+
+def write_coverage_change(recipe_ids):
+    versions = caches['versions']
+    generation, _ = get_coverage_version()
+    try:
+        counter = versions.incr(COVERAGE_COUNTER_KEY.format(generation))
+    except ValueError:
+        reset_coverage()
+        return
+    versions.set(COVERAGE_CHANGE_KEY.format(generation, counter),
+                 list(recipe_ids), COVERAGE_CHANGE_TIMEOUT)
+
+
+def record_ingredient_changes(recipe_ids):
+    """Записывает в журнал рецепты, у которых изменился состав
+    ингредиентов, после фиксации транзакции"""
+    recipe_ids = set(recipe_ids)
+    transaction.on_commit(lambda: write_coverage_change(recipe_ids))
+
+
+class IngredientCoverageIndex:
+    """Инвертированный индекс ингредиент -> отсортированный массив id
+    рецептов, в которых он используется. Изменения рецептов применяются
+    по журналу из общего кэша; целиком индекс перестраивается только
+    при старте, смене поколения или слишком длинном отставании"""
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.version = None
+        # (ингредиент -> id рецептов, рецепт -> id ингредиентов)
+        self.state = ({}, {})
+
+    def build(self):
+        postings = defaultdict(lambda: array('I'))
+        ingredients = defaultdict(lambda: array('I'))
+        for ingredient_id, recipe_id in RecipeIngredient.objects.order_by(
+                'ingredient_id', 'recipe_id').values_list(
+                'ingredient_id', 'recipe_id'):
+            postings[ingredient_id].append(recipe_id)
+            ingredients[recipe_id].append(ingredient_id)
+        self.state = (dict(postings), dict(ingredients))
+
+    def get_changes(self, version):
+        """Возвращает id рецептов, измененных после self.version,
+        или None, если изменения нельзя применить по журналу"""
+        generation, counter = version
+        if self.version is None or self.version[0] != generation:
+            return None
+        start = self.version[1] + 1
+        if counter - start >= COVERAGE_MAX_CHANGES:
+            return None
+        keys = [COVERAGE_CHANGE_KEY.format(generation, number)
+                for number in range(start, counter + 1)]
+        changes = caches['versions'].get_many(keys)
+        if len(changes) != len(keys):
+            return None
+        return set().union(*changes.values())
+
+    def apply(self, recipe_ids):
+        """Заменяет в индексе ингредиенты рецептов recipe_ids"""
+        postings, ingredients = self.state
+        postings = dict(postings)
+        ingredients = dict(ingredients)
+        changed = {}
+        for recipe_id in recipe_ids:
+            for ingredient_id in ingredients.pop(recipe_id, ()):
+                changed.setdefault(ingredient_id, set())
+        added = defaultdict(lambda: array('I'))
+        for ingredient_id, recipe_id in RecipeIngredient.objects.filter(
+                recipe_id__in=recipe_ids).order_by(
+                'recipe_id').values_list('ingredient_id', 'recipe_id'):
+            added[recipe_id].append(ingredient_id)
+            changed.setdefault(ingredient_id, set()).add(recipe_id)
+        ingredients.update(added)
+        for ingredient_id, new_recipe_ids in changed.items():
+            posting = array('I', (
+                recipe_id for recipe_id in postings.get(ingredient_id, ())
+                if recipe_id not in recipe_ids
+            ))
+            for recipe_id in new_recipe_ids:
+                bisect.insort(posting, recipe_id)
+            if posting:
+                postings[ingredient_id] = posting
+            else:
+                postings.pop(ingredient_id, None)
+        self.state = (postings, ingredients)
+
+    def refresh(self):
+        version = get_coverage_version()
+        if version == self.version:
+            return
+        # Пока другой поток обновляет индекс, запросы читают прежний.
+        if not self.lock.acquire(blocking=self.version is None):
+            return
+        try:
+            with primary():
+                if version == self.version:
+                    return
+                changes = self.get_changes(version)
+                if changes is None:
+                    self.build()
+                else:
+                    self.apply(changes)
+                self.version = version
+        finally:
+            self.lock.release()
+
+    def rank(self, ingredient_ids):
+        """Возвращает {id рецепта: ранг}: сначала полностью покрытые
+        рецепты, затем по числу покрытых и недостающих ингредиентов"""
+        self.refresh()
+        postings, ingredients = self.state
+        covered = Counter()
+        for ingredient_id in set(ingredient_ids):
+            covered.update(postings.get(ingredient_id, ()))
+        keys = {}
+        for pk, count in covered.items():
+            size = len(ingredients[pk])
+            keys[pk] = (count == size, count, count - size)
+        ranks = {key: rank for rank, key in enumerate(sorted(set(
+            keys.values())), start=1)}
+        return {pk: ranks[key] for pk, key in keys.items()}
+
+
+coverage_index = IngredientCoverageIndex()
+
+
+def filter_by_coverage(queryset, ingredient_ids):
+    """Оставляет рецепты, в которых есть хотя бы один из ингредиентов,
+    и сортирует их по покрытию"""
+    return queryset.rank(coverage_index.rank(ingredient_ids))
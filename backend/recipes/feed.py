@@ -0,0 +1,84 @@
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+from users.models import Subscribe
+
+from .models import FeedItem, Recipe
+
+
+def get_follower_ids(author_id):
+    return Subscribe.objects.filter(
+        author_id=author_id).values_list('user_id', flat=True)
+
+
+def is_hot_author(author):
+    """Авторы с большим числом подписчиков не рассылаются по лентам,
+    их рецепты подмешиваются в ленту при чтении. Число подписчиков
+    берется из счетчика followers_count"""
+    return author.followers_count > settings.FEED_FANOUT_MAX_FOLLOWERS
+
+
+def trim_feeds(user_ids):
+    """Оставляет в лентах пользователей только FEED_MAX_LENGTH
+    последних рецептов одним запросом с оконной функцией ROW_NUMBER"""
+    user_ids = list(user_ids)
+    if not user_ids:
+        return
+    table = FeedItem._meta.db_table
+    placeholders = ', '.join(['%s'] * len(user_ids))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {table} WHERE id IN (SELECT id FROM ('
+            f'SELECT id, ROW_NUMBER() OVER (PARTITION BY user_id '
+            f'ORDER BY recipe_id DESC) AS row_number FROM {table} '
+            f'WHERE user_id IN ({placeholders})) AS ranked '
+            f'WHERE row_number > %s)',
+            [*user_ids, settings.FEED_MAX_LENGTH]
+        )
+
+
+def fan_out(recipe):
+    """Добавляет рецепт в ленты подписчиков автора.
+    Если автор рассылается при чтении, отмечает это в рецепте
+    и возвращает False: решение принимается один раз при публикации"""
+    if is_hot_author(recipe.author):
+        Recipe.objects.filter(pk=recipe.pk).update(fan_out_on_read=True)
+        return False
+    user_ids = list(get_follower_ids(recipe.author_id))
+    batch_size = settings.FEED_FANOUT_BATCH_SIZE
+    for start in range(0, len(user_ids), batch_size):
+        batch = user_ids[start:start + batch_size]
+        FeedItem.objects.bulk_create(
+            [FeedItem(user_id=user_id, recipe=recipe) for user_id in batch],
+            ignore_conflicts=True,
+        )
+        trim_feeds(batch)
+    return True
+
+
+def add_author_to_feed(user, author):
+    """Заполняет ленту последними рецептами нового автора"""
+    if is_hot_author(author):
+        return
+    recipe_ids = Recipe.objects.filter(
+        author=author, fan_out_on_read=False).order_by(
+        '-id').values_list('id', flat=True)[:settings.FEED_MAX_LENGTH]
+    FeedItem.objects.bulk_create(
+        [FeedItem(user=user, recipe_id=pk) for pk in recipe_ids],
+        ignore_conflicts=True,
+    )
+    trim_feeds([user.id])
+
+
+def remove_author_from_feed(user, author):
+    FeedItem.objects.filter(user=user, recipe__author=author).delete()
+
+
+def get_feed(queryset, user):
+    """Рецепты из ленты пользователя и оставленные для рассылки
+    при чтении рецепты авторов из его подписок"""
+    return queryset.filter(
+        Q(pk__in=FeedItem.objects.filter(user=user).values('recipe_id'))
+        | Q(fan_out_on_read=True, author_id__in=Subscribe.objects.filter(
+            user=user).values('author_id'))
+    )
@@ -1,14 +1,30 @@
+from django.conf import settings
+from django.db.models import Exists, F, OuterRef
 from django_filters import rest_framework as filters
 
-from .models import Ingredient, Recipe, Tag
+from .catalog import catalog
+from .coverage import filter_by_coverage
+from .models import Ingredient, Recipe, RecipeTag
+from .relations import get_user_relations
+from .search import search_recipes
+from .utils import TAGS_MASK_BITS, get_tags_mask
+
+TAGS_MASK_IN_LIMIT = 8
+
+
+def get_tag_choices():
+    return catalog.get_tag_choices()
+
+
+class NumberInFilter(filters.BaseInFilter, filters.NumberFilter):
+    """Фильтр по списку чисел через запятую"""
 
 
 class RecipeFilter(filters.FilterSet):
     """Фильтр рецептов"""
-    tags = filters.filters.ModelMultipleChoiceFilter(
-        queryset=Tag.objects.all(),
-        field_name='tags__slug',
-        to_field_name='slug',
+    tags = filters.MultipleChoiceFilter(
+        choices=get_tag_choices,
+        method='filter_tags',
     )
     author = filters.CharFilter(lookup_expr='exact')
     is_in_shopping_cart = filters.BooleanFilter(
@@ -17,22 +33,61 @@ class RecipeFilter(filters.FilterSet):
     is_favorited = filters.BooleanFilter(
         field_name='is_favorited', method='filter'
     )
+    search = filters.CharFilter(method='filter_search')
+    ingredients = NumberInFilter(method='filter_ingredients')
+
+    def filter_tags(self, queryset, name, value):
+        """Метод фильтрации рецептов по слагам тегов из кэша справочников:
+        по маске тегов, если она включена, иначе через EXISTS"""
+        tag_ids = catalog.get_tag_ids_by_slugs(value)
+        if settings.RECIPE_TAGS_BITMASK and all(
+                1 <= tag_id <= TAGS_MASK_BITS for tag_id in tag_ids):
+            return self.filter_tags_mask(queryset, get_tags_mask(tag_ids))
+        return queryset.annotate(has_tags=Exists(RecipeTag.objects.filter(
+            recipe=OuterRef('pk'), tag_id__in=tag_ids))).filter(has_tags=True)
+
+    def filter_tags_mask(self, queryset, mask):
+        """Пока тегов мало, перечисляет все маски, пересекающиеся с mask,
+        чтобы запрос шел по индексу tags_mask"""
+        known = get_tags_mask(tag.id for tag in catalog.get_tags())
+        if bin(known).count('1') > TAGS_MASK_IN_LIMIT:
+            return queryset.annotate(
+                tags_match=F('tags_mask').bitand(mask)
+            ).exclude(tags_match=0)
+        masks = []
+        submask = known
+        while submask:
+            if submask & mask:
+                masks.append(submask)
+            submask = (submask - 1) & known
+        return queryset.filter(tags_mask__in=masks)
+
+    def filter_search(self, queryset, name, value):
+        """Метод полнотекстового поиска по названию и описанию"""
+        return search_recipes(queryset, value)
+
+    def filter_ingredients(self, queryset, name, value):
+        """Метод подбора рецептов по имеющимся ингредиентам"""
+        return filter_by_coverage(queryset, [int(pk) for pk in value])
+
+    relations = {
+        'is_favorited': 'favorites',
+        'is_in_shopping_cart': 'cart',
+    }
 
     def filter(self, queryset, name, value):
-        """Метод фильтрации рецептов"""
-        if name == 'is_in_shopping_cart' and value:
-            queryset = queryset.filter(
-                shopping_cart__user=self.request.user
-            )
-        if name == 'is_favorited' and value:
+        """Метод фильтрации рецептов по флагам
+        из кэша связей текущего пользователя"""
+        if value:
+            relations = get_user_relations(self.request)
             queryset = queryset.filter(
-                favorite__user=self.request.user
-            )
+                pk__in=list(getattr(relations, self.relations[name])))
         return queryset
 
     class Meta:
         model = Recipe
-        fields = ('author', 'tags', 'is_in_shopping_cart', 'is_favorited',)
+        fields = ('author', 'tags', 'is_in_shopping_cart', 'is_favorited',
+                  'search', 'ingredients',)
 
 
 class IngredientsFilter(filters.FilterSet):
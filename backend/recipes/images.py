@@ -0,0 +1,60 @@
+import os
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image
+
+IMAGE_FORMATS = (('webp', 'WEBP'), ('jpeg', 'JPEG'))
+
+
+def get_variant_name(image_name, variant, extension):
+    """Возвращает путь уменьшенной копии картинки в хранилище"""
+    root, _ = os.path.splitext(os.path.basename(image_name))
+    return f'recipes/variants/{root}_{variant}.{extension}'
+
+
+def generate_variants(image_name):
+    """Сохраняет уменьшенные копии картинки во всех размерах и форматах"""
+    with default_storage.open(image_name) as file:
+        original = Image.open(file)
+        original.load()
+    for variant, width in settings.RECIPE_IMAGE_VARIANTS.items():
+        image = original.copy()
+        image.thumbnail((width, width * 4), Image.LANCZOS)
+        for extension, image_format in IMAGE_FORMATS:
+            converted = image
+            if image_format == 'JPEG' or image.mode not in ('RGB', 'RGBA'):
+                converted = image.convert(
+                    'RGB' if image_format == 'JPEG' else 'RGBA')
+            buffer = BytesIO()
+            converted.save(buffer, image_format, quality=85)
+            name = get_variant_name(image_name, variant, extension)
+            if default_storage.exists(name):
+                default_storage.delete(name)
+            default_storage.save(name, ContentFile(buffer.getvalue()))
+
+
+def delete_variants(image_name):
+    """Удаляет уменьшенные копии картинки из хранилища"""
+    for variant in settings.RECIPE_IMAGE_VARIANTS:
+        for extension, _ in IMAGE_FORMATS:
+            name = get_variant_name(image_name, variant, extension)
+            if default_storage.exists(name):
+                default_storage.delete(name)
+
+
+def get_variant_urls(recipe):
+    """Возвращает адреса уменьшенных копий картинки рецепта
+    или None, если они еще не готовы"""
+    if not recipe.image or recipe.image_variants_of != recipe.image.name:
+        return None
+    return {
+        variant: {
+            extension: default_storage.url(
+                get_variant_name(recipe.image.name, variant, extension))
+            for extension, _ in IMAGE_FORMATS
+        }
+        for variant in settings.RECIPE_IMAGE_VARIANTS
+    }
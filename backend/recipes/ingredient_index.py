@@ -0,0 +1,74 @@
+import gzip
+import hashlib
+import json
+import threading
+from bisect import bisect_left
+
+from .catalog import catalog
+
+SEARCH_CACHE_SIZE = 1024
+
+
+class SearchResult:
+    """Готовый к отдаче ответ поиска ингредиентов"""
+    def __init__(self, fragments, version):
+        self.content = b'[' + b','.join(fragments) + b']'
+        self.gzip_content = gzip.compress(self.content)
+        self.etag = '"{}"'.format(hashlib.md5(
+            version.encode() + self.content).hexdigest())
+
+
+class IngredientPrefixIndex:
+    """Отсортированный индекс ингредиентов по названию
+    с заранее сериализованными JSON-фрагментами"""
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.version = None
+        self.keys = []
+        self.fragments = []
+        self.results = {}
+
+    def build(self, version):
+        rows = sorted(
+            (ingredient.name.lower(), json.dumps(
+                {'id': ingredient.id, 'name': ingredient.name,
+                 'measurement_unit': ingredient.measurement_unit},
+                ensure_ascii=False, separators=(',', ':')
+            ).encode())
+            for ingredient in catalog.get_ingredients()
+        )
+        self.keys = [key for key, _ in rows]
+        self.fragments = [fragment for _, fragment in rows]
+        self.results = {}
+        self.version = version
+
+    def refresh(self):
+        """Перестраивает индекс, если справочник изменился"""
+        version = catalog.refresh()
+        if version != self.version:
+            with self.lock:
+                if version != self.version:
+                    self.build(version)
+        return version
+
+    def search(self, prefix, limit=None):
+        """Возвращает ингредиенты, название которых начинается с prefix"""
+        version = self.refresh()
+        prefix = prefix.lower()
+        key = (version, prefix, limit)
+        result = self.results.get(key)
+        if result is not None:
+            return result
+        start = bisect_left(self.keys, prefix)
+        end = start
+        while (end < len(self.keys) and (limit is None or end - start < limit)
+               and self.keys[end].startswith(prefix)):
+            end += 1
+        result = SearchResult(self.fragments[start:end], version)
+        if len(self.results) >= SEARCH_CACHE_SIZE:
+            self.results.clear()
+        self.results[key] = result
+        return result
+
+
+ingredient_index = IngredientPrefixIndex()
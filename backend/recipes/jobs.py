@@ -0,0 +1,71 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+MAX_ATTEMPTS = 3
+
+
+class JobWorkerCommand(BaseCommand):
+    """Базовая команда обработчика очереди задач model. Задачи
+    забираются по одной через SKIP LOCKED, упавшие возвращаются
+    в очередь с растущей задержкой JOB_RETRY_DELAY и после
+    MAX_ATTEMPTS попыток помечаются как FAILED"""
+    model = None
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Exit when the queue is empty',
+        )
+        parser.add_argument(
+            '--sleep', type=float, default=2,
+            help='Seconds to wait when the queue is empty',
+        )
+
+    def claim_job(self):
+        with transaction.atomic():
+            job = self.model.objects.select_for_update(
+                skip_locked=True
+            ).filter(
+                status=self.model.PENDING,
+                available_at__lte=timezone.now(),
+            ).first()
+            if job is not None:
+                job.attempts += 1
+                job.save(update_fields=('attempts',))
+            return job
+
+    def process(self, job):
+        raise NotImplementedError
+
+    def finish(self, job, message):
+        job.status = self.model.DONE
+        job.save(update_fields=('status',))
+        self.stdout.write(f'Job {job.pk} {message}')
+
+    def fail(self, job, error):
+        job.error = repr(error)
+        if job.attempts >= MAX_ATTEMPTS:
+            job.status = self.model.FAILED
+        else:
+            job.available_at = timezone.now() + timedelta(
+                seconds=settings.JOB_RETRY_DELAY * 2 ** (job.attempts - 1))
+        job.save(update_fields=('status', 'error', 'available_at'))
+        self.stderr.write(f'Job {job.pk} failed: {error!r}')
+
+    def handle(self, *args, **options):
+        while True:
+            job = self.claim_job()
+            if job is not None:
+                try:
+                    self.process(job)
+                except Exception as error:
+                    self.fail(job, error)
+            elif options['once']:
+                break
+            else:
+                time.sleep(options['sleep'])
@@ -0,0 +1,205 @@
+import json
+import subprocess
+import time
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.management import BaseCommand, CommandError
+from django.db import connection, reset_queries
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, setup_test_environment
+from recipes.management.commands.generate_dataset import (PASSWORD,
+                                                          USERNAME_PREFIX)
+from recipes.models import Ingredient, Recipe, Tag
+from rest_framework.authtoken.models import Token
+from users.models import User
+
+IMAGE = (
+    'data:image/png;base64,iVBORw0KGgoAAAANSUhEUgAAAAEAAAABAgMAAABieywaAAAA'
+    'CVBMVEUAAAD///9fX1/S0ecCAAAACXBIWXMAAA7EAAAOxAGVKw4bAAAACklEQVQImWNoAAAA'
+    'ggCByxOyYQAAAABJRU5ErkJggg=='
+)
+
+
+def percentile(values, share):
+    return values[min(len(values) - 1, int(len(values) * share))]
+
+
+class Command(BaseCommand):
+    help = ('Benchmark every recipes and users route on the generated '
+            'dataset and print latency and query counts as JSON')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=50)
+        parser.add_argument('--warmup', type=int, default=3)
+        parser.add_argument(
+            '--route', action='append', dest='routes',
+            help='Benchmark only this route, may be repeated',
+        )
+        parser.add_argument('--output', help='Write the report to a file')
+
+    def get_routes(self):
+        """Маршруты в виде (имя, анонимно, запрос, парный запрос),
+        парный запрос возвращает данные в исходное состояние"""
+        try:
+            user = User.objects.filter(
+                username__startswith=USERNAME_PREFIX).earliest('id')
+        except User.DoesNotExist:
+            raise CommandError('Run generate_dataset first')
+        other = User.objects.filter(
+            username__startswith=USERNAME_PREFIX).exclude(
+            pk=user.pk).exclude(subscribing__user=user).earliest('id')
+        recipe = Recipe.objects.exclude(favorite__user=user).exclude(
+            shopping_cart__user=user).latest('id')
+        tags = list(Tag.objects.values_list('slug', flat=True)[:2])
+        ingredients = list(Ingredient.objects.filter(
+            recipeingredient__recipe=recipe).values_list('id', flat=True))
+        ingredient = Ingredient.objects.earliest('id')
+        new_recipe = json.dumps({
+            'name': 'Бенчмарк', 'text': 'Бенчмарк', 'cooking_time': 10,
+            'image': IMAGE, 'tags': [Tag.objects.earliest('id').id],
+            'ingredients': [{'id': ingredient.id, 'amount': 10}],
+        })
+        created = []
+
+        def create_recipe(client):
+            response = client.post('/api/recipes/', new_recipe,
+                                   content_type='application/json')
+            created.append(response.json()['id'])
+            return response
+
+        def delete_recipe(client, response):
+            recipe_id = created.pop()
+            image = Recipe.objects.get(pk=recipe_id).image.name
+            response = client.delete(f'/api/recipes/{recipe_id}/')
+            default_storage.delete(image)
+            return response
+
+        def login(client):
+            return client.post('/api/auth/token/login/', {
+                'email': other.email, 'password': PASSWORD})
+
+        def logout(client, response):
+            return client.post(
+                '/api/auth/token/logout/',
+                HTTP_AUTHORIZATION=f'Token {response.json()["auth_token"]}')
+
+        get = self.get
+        return user, [
+            ('recipes:list:anonymous', True, get('/api/recipes/'), None),
+            ('recipes:list', False, get('/api/recipes/'), None),
+            ('recipes:list:tags', False,
+             get('/api/recipes/', {'tags': tags}), None),
+            ('recipes:list:favorited', False,
+             get('/api/recipes/', {'is_favorited': 1}), None),
+            ('recipes:list:search', False,
+             get('/api/recipes/', {'search': recipe.name.split()[0]}), None),
+            ('recipes:list:ingredients', False, get('/api/recipes/', {
+                'ingredients': ','.join(map(str, ingredients))}), None),
+            ('recipes:list:cursor', False,
+             get('/api/recipes/', {'cursor': ''}), None),
+            ('recipes:detail', False, get(f'/api/recipes/{recipe.id}/'), None),
+            ('recipes:feed', False, get('/api/recipes/feed/'), None),
+            ('recipes:download_shopping_cart', False,
+             get('/api/recipes/download_shopping_cart/'), None),
+            ('recipes:create', False, create_recipe, delete_recipe),
+            ('recipes:favorite', False,
+             lambda client: client.post(f'/api/recipes/{recipe.id}/favorite/'),
+             lambda client, response: client.delete(
+                 f'/api/recipes/{recipe.id}/favorite/')),
+            ('recipes:shopping_cart', False,
+             lambda client: client.post(
+                 f'/api/recipes/{recipe.id}/shopping_cart/'),
+             lambda client, response: client.delete(
+                 f'/api/recipes/{recipe.id}/shopping_cart/')),
+            ('ingredients:list', True,
+             get('/api/ingredients/', {'name': ingredient.name[:2]}), None),
+            ('ingredients:detail', True,
+             get(f'/api/ingredients/{ingredient.id}/'), None),
+            ('tags:list', True, get('/api/tags/'), None),
+            ('tags:detail', True,
+             get(f'/api/tags/{Tag.objects.earliest("id").id}/'), None),
+            ('users:list', False, get('/api/users/'), None),
+            ('users:detail', False, get(f'/api/users/{other.id}/'), None),
+            ('users:me', False, get('/api/users/me/'), None),
+            ('users:subscriptions', False,
+             get('/api/users/subscriptions/'), None),
+            ('users:subscribe', False,
+             lambda client: client.post(f'/api/users/{other.id}/subscribe/'),
+             lambda client, response: client.delete(
+                 f'/api/users/{other.id}/subscribe/')),
+            ('auth:login', True, login, logout),
+        ]
+
+    def get(self, path, data=None):
+        return lambda client: client.get(path, data)
+
+    def measure(self, client, request, cleanup, iterations, warmup):
+        latencies = []
+        queries = []
+        errors = 0
+        for iteration in range(warmup + iterations):
+            reset_queries()
+            with CaptureQueriesContext(connection) as context:
+                start = time.perf_counter()
+                response = request(client)
+                # Потоковый ответ выполняет запросы при чтении тела.
+                if response.streaming:
+                    b''.join(response.streaming_content)
+                latency = time.perf_counter() - start
+            response.close()
+            if response.status_code >= 400:
+                errors += 1
+            if cleanup is not None:
+                cleanup(client, response)
+            if iteration >= warmup:
+                latencies.append(latency)
+                queries.append(len(context.captured_queries))
+        latencies.sort()
+        queries.sort()
+        return {
+            'requests': iterations,
+            'errors': errors,
+            'rps': round(iterations / sum(latencies), 1),
+            'p50_ms': round(percentile(latencies, 0.5) * 1000, 2),
+            'p95_ms': round(percentile(latencies, 0.95) * 1000, 2),
+            'p99_ms': round(percentile(latencies, 0.99) * 1000, 2),
+            'queries_p50': percentile(queries, 0.5),
+            'queries_max': queries[-1],
+        }
+
+    def get_commit(self):
+        try:
+            return subprocess.run(
+                ['git', 'rev-parse', '--short', 'HEAD'],
+                cwd=settings.BASE_DIR, capture_output=True, text=True,
+                check=True,
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        user, routes = self.get_routes()
+        token, _ = Token.objects.get_or_create(user=user)
+        anonymous = Client()
+        authorized = Client(HTTP_AUTHORIZATION=f'Token {token.key}')
+        report = {
+            'commit': self.get_commit(),
+            'database': connection.vendor,
+            'users': User.objects.count(),
+            'recipes': Recipe.objects.count(),
+            'iterations': options['iterations'],
+            'routes': {},
+        }
+        for name, is_anonymous, request, cleanup in routes:
+            if options['routes'] and name not in options['routes']:
+                continue
+            report['routes'][name] = self.measure(
+                anonymous if is_anonymous else authorized,
+                request, cleanup, options['iterations'], options['warmup'])
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w', encoding='UTF-8') as file:
+                file.write(output)
+        self.stdout.write(output)
@@ -0,0 +1,106 @@
+import http.client
+import json
+import socket
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management import BaseCommand, CommandError
+
+SERVERS = {
+    'wsgi': ['foodgram.wsgi:application'],
+    'asgi': ['foodgram.asgi:application',
+             '--worker-class', 'uvicorn.workers.UvicornWorker'],
+}
+
+
+class Command(BaseCommand):
+    help = 'Compare WSGI and ASGI gunicorn throughput at fixed worker count'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=2)
+        parser.add_argument('--concurrency', type=int, default=16)
+        parser.add_argument('--duration', type=float, default=10)
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument(
+            '--path', action='append', dest='paths',
+            help='Path to request, may be repeated '
+                 '(default: /api/recipes/)',
+        )
+
+    def wait_for_port(self, port, timeout=30):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            try:
+                socket.create_connection(('127.0.0.1', port), 1).close()
+                return
+            except OSError:
+                time.sleep(0.2)
+        raise CommandError(f'Server did not start on port {port}')
+
+    def load(self, port, paths, deadline):
+        latencies = []
+        errors = 0
+        connection = http.client.HTTPConnection('127.0.0.1', port)
+        while time.monotonic() < deadline:
+            path = paths[len(latencies) % len(paths)]
+            start = time.monotonic()
+            try:
+                connection.request('GET', path)
+                response = connection.getresponse()
+                response.read()
+                if response.status >= 500:
+                    errors += 1
+            except (OSError, http.client.HTTPException):
+                errors += 1
+                connection.close()
+                connection = http.client.HTTPConnection('127.0.0.1', port)
+                continue
+            latencies.append(time.monotonic() - start)
+        connection.close()
+        return latencies, errors
+
+    def run_server(self, mode, options):
+        server = subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', *SERVERS[mode],
+             '--bind', f'127.0.0.1:{options["port"]}',
+             '--workers', str(options['workers'])],
+            cwd=settings.BASE_DIR,
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        try:
+            self.wait_for_port(options['port'])
+            paths = options['paths'] or ['/api/recipes/']
+            deadline = time.monotonic() + options['duration']
+            with ThreadPoolExecutor(options['concurrency']) as executor:
+                results = list(executor.map(
+                    lambda _: self.load(options['port'], paths, deadline),
+                    range(options['concurrency'])
+                ))
+        finally:
+            server.terminate()
+            server.wait()
+        latencies = sorted(
+            latency for worker, _ in results for latency in worker)
+        if not latencies:
+            raise CommandError(f'No successful requests in {mode} mode')
+        return {
+            'requests': len(latencies),
+            'errors': sum(errors for _, errors in results),
+            'rps': round(len(latencies) / options['duration'], 1),
+            'p50_ms': round(latencies[len(latencies) // 2] * 1000, 2),
+            'p95_ms': round(
+                latencies[int(len(latencies) * 0.95)] * 1000, 2),
+        }
+
+    def handle(self, *args, **options):
+        report = {
+            'workers': options['workers'],
+            'concurrency': options['concurrency'],
+            'duration': options['duration'],
+        }
+        for mode in SERVERS:
+            report[mode] = self.run_server(mode, options)
+        self.stdout.write(json.dumps(report, indent=2))
@@ -0,0 +1,128 @@
+import hashlib
+import json
+import os
+import time
+from functools import partial
+from io import StringIO
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.contrib.staticfiles.finders import get_finders
+from django.core.management import BaseCommand, call_command
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import Client
+from foodgram.warmup import import_app_modules
+from recipes.models import BootState, Ingredient
+
+STATIC_HASH_FILE = '.static_hash'
+INGREDIENT_FILES = ('ingredients.csv', 'ingredients.json')
+IGNORE_PATTERNS = ['CVS', '.*', '*~']
+
+
+class Command(BaseCommand):
+    help = ('Run migrate, collectstatic and data_loading only when '
+            'something changed, then optionally warm caches')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--warm', action='store_true',
+            help='Request the first recipe pages to fill the response cache',
+        )
+        parser.add_argument('--warm-pages', type=int, default=3)
+        parser.add_argument(
+            '--force', action='store_true',
+            help='Run every step regardless of stored checksums',
+        )
+
+    def step(self, name, function, *args):
+        start = time.monotonic()
+        result = function(*args)
+        self.timings[name] = {
+            'ms': round((time.monotonic() - start) * 1000, 1),
+            'result': result,
+        }
+        self.stdout.write(f'{name}: {result}')
+
+    def migrate(self, force):
+        executor = MigrationExecutor(connection)
+        plan = executor.migration_plan(executor.loader.graph.leaf_nodes())
+        if not plan and not force:
+            return 'skipped'
+        call_command('migrate', interactive=False, verbosity=0)
+        return f'applied {len(plan)}'
+
+    def get_static_hash(self):
+        digest = hashlib.sha256()
+        for finder in get_finders():
+            for path, storage in sorted(
+                    finder.list(IGNORE_PATTERNS), key=lambda item: item[0]):
+                stat = os.stat(storage.path(path))
+                digest.update(
+                    f'{path}:{stat.st_size}:{stat.st_mtime_ns}\n'.encode())
+        return digest.hexdigest()
+
+    def collectstatic(self, force):
+        static_hash = self.get_static_hash()
+        hash_path = os.path.join(settings.STATIC_ROOT, STATIC_HASH_FILE)
+        if not force and os.path.exists(hash_path):
+            with open(hash_path) as file:
+                if file.read() == static_hash:
+                    return 'skipped'
+        call_command('collectstatic', interactive=False, verbosity=0)
+        with open(hash_path, 'w') as file:
+            file.write(static_hash)
+        return 'collected'
+
+    def get_ingredients_checksum(self):
+        digest = hashlib.sha256()
+        for filename in INGREDIENT_FILES:
+            path = os.path.join(settings.BASE_DIR, 'data', filename)
+            if os.path.exists(path):
+                with open(path, 'rb') as file:
+                    digest.update(file.read())
+        return digest.hexdigest()
+
+    def load_ingredients(self, force):
+        checksum = self.get_ingredients_checksum()
+        if (not force and Ingredient.objects.exists()
+                and BootState.objects.filter(
+                    name='ingredients', checksum=checksum).exists()):
+            return 'skipped'
+        call_command('data_loading', stdout=StringIO())
+        BootState.objects.update_or_create(
+            name='ingredients', defaults={'checksum': checksum})
+        return 'loaded'
+
+    def warm(self, pages):
+        # Кэш ответов общий с рабочими запросами, поэтому прогрев идет
+        # от имени настоящего адреса сайта, а не testserver.
+        site = urlsplit(settings.SITE_URL)
+        get = partial(Client().get, HTTP_HOST=site.netloc,
+                      secure=site.scheme == 'https')
+        tags = get('/api/tags/').json()
+        tags_query = ''.join(f'&tags={tag["slug"]}' for tag in tags)
+        get('/api/ingredients/')
+        requests = 2
+        for page in range(1, pages + 1):
+            requests += 2
+            if get(f'/api/recipes/?page={page}&limit=6'
+                   f'{tags_query}').status_code != 200:
+                break
+            get(f'/api/recipes/?page={page}&limit=6')
+        return f'{requests} requests'
+
+    def handle(self, *args, **options):
+        start = time.monotonic()
+        self.timings = {}
+        self.step('migrate', self.migrate, options['force'])
+        self.step('collectstatic', self.collectstatic, options['force'])
+        self.step('data_loading', self.load_ingredients, options['force'])
+        self.step('import_modules',
+                  lambda: f'{len(import_app_modules())} modules')
+        if options['warm']:
+            self.step('warm_caches', self.warm, options['warm_pages'])
+        self.timings['total_ms'] = round(
+            (time.monotonic() - start) * 1000, 1)
+        self.stdout.write(json.dumps(self.timings, indent=2))
+        self.stdout.write(self.style.SUCCESS('Ready'))
@@ -1,22 +1,62 @@
 import csv
+import json
+import os
+import time
 
+from django.conf import settings
 from django.core.management import BaseCommand
+from recipes.catalog import bump_catalog_version
 from recipes.models import Ingredient
 
+BATCH_SIZE = 500
+
 
 class Command(BaseCommand):
-    help = 'Load csv data'
+    help = 'Load csv and json ingredients data'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Show new ingredients without writing them',
+        )
 
-    def handle(self, *args, **kwargs):
-        with open('./data/ingredients.csv',
-                  newline='', encoding='UTF-8') as file:
-            file_reader = csv.reader(file)
-            for row in file_reader:
+    def read_csv(self, path):
+        with open(path, newline='', encoding='UTF-8') as file:
+            for row in csv.reader(file):
                 name, measurement_unit = row
                 if name != 'name':
-                    Ingredient.objects.get_or_create(
-                        name=name,
-                        measurement_unit=measurement_unit
-                    )
+                    yield name, measurement_unit
+
+    def read_json(self, path):
+        with open(path, encoding='UTF-8') as file:
+            for item in json.load(file):
+                yield item['name'], item['measurement_unit']
 
-        self.stdout.write(self.style.SUCCESS('Successfully'))
+    def handle(self, *args, **options):
+        start = time.monotonic()
+        data_dir = os.path.join(settings.BASE_DIR, 'data')
+        loaded = {}
+        for reader, filename in ((self.read_csv, 'ingredients.csv'),
+                                 (self.read_json, 'ingredients.json')):
+            path = os.path.join(data_dir, filename)
+            if os.path.exists(path):
+                loaded.update(dict.fromkeys(reader(path)))
+        existing = set(
+            Ingredient.objects.values_list('name', 'measurement_unit'))
+        new = [key for key in loaded if key not in existing]
+        if options['dry_run']:
+            for name, measurement_unit in new:
+                self.stdout.write(f'+ {name}, {measurement_unit}')
+        elif new:
+            Ingredient.objects.bulk_create(
+                [Ingredient(name=name, measurement_unit=measurement_unit)
+                 for name, measurement_unit in new],
+                batch_size=BATCH_SIZE,
+                ignore_conflicts=True,
+            )
+            bump_catalog_version()
+        self.stdout.write(self.style.SUCCESS(
+            f'Read: {len(loaded)}, existing: {len(existing)}, '
+            f'{"to create" if options["dry_run"] else "created"}: '
+            f'{len(new)}, time: {time.monotonic() - start:.2f}s'
+        ))
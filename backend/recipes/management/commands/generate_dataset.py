@@ -0,0 +1,177 @@
+import random
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.management import BaseCommand, CommandError, call_command
+from django.db import transaction
+from recipes.caching import bump_recipes_version
+from recipes.catalog import bump_catalog_version
+from recipes.coverage import reset_coverage
+from recipes.models import (Favorite, FeedItem, Ingredient, Recipe,
+                            RecipeIngredient, RecipeTag, ShoppingCart, Tag)
+from recipes.utils import get_tags_mask
+from users.models import Subscribe, User
+
+BATCH_SIZE = 500
+USERNAME_PREFIX = 'bench_user_'
+PASSWORD = 'bench-password'
+TAGS = (
+    ('Завтрак', '#E26C2D', 'breakfast'),
+    ('Обед', '#49B64E', 'lunch'),
+    ('Ужин', '#8775D2', 'dinner'),
+    ('Десерт', '#D2B48C', 'dessert'),
+    ('Перекус', '#4A61DD', 'snack'),
+)
+WORDS = (
+    'суп', 'салат', 'пирог', 'рагу', 'запеканка', 'паста', 'омлет',
+    'каша', 'котлеты', 'блины', 'борщ', 'плов', 'ризотто', 'шарлотка',
+    'домашний', 'быстрый', 'летний', 'острый', 'сливочный', 'овощной',
+)
+
+
+class Command(BaseCommand):
+    help = 'Generate a deterministic synthetic dataset for benchmarks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument('--recipes', type=int, default=1000)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--favorites', type=int, default=20,
+                            help='Max favorites per user')
+        parser.add_argument('--cart', type=int, default=5,
+                            help='Max shopping cart recipes per user')
+        parser.add_argument('--subscriptions', type=int, default=10,
+                            help='Max subscriptions per user')
+        parser.add_argument(
+            '--clear', action='store_true',
+            help='Delete a previously generated dataset first',
+        )
+
+    def bulk_create(self, model, objects):
+        model.objects.bulk_create(objects, batch_size=BATCH_SIZE)
+        self.stdout.write(f'{model.__name__}: {len(objects)}')
+
+    def create_tags(self):
+        existing = set(Tag.objects.values_list('slug', flat=True))
+        Tag.objects.bulk_create([
+            Tag(name=name, color=color, slug=slug)
+            for name, color, slug in TAGS if slug not in existing
+        ])
+        return list(Tag.objects.order_by('id').values_list('id', flat=True))
+
+    def create_users(self, count):
+        password = make_password(PASSWORD)
+        self.bulk_create(User, [
+            User(username=f'{USERNAME_PREFIX}{number}',
+                 email=f'{USERNAME_PREFIX}{number}@example.com',
+                 first_name='Пользователь', last_name=str(number),
+                 password=password)
+            for number in range(count)
+        ])
+        return list(User.objects.filter(
+            username__startswith=USERNAME_PREFIX
+        ).order_by('id').values_list('id', flat=True))
+
+    def create_recipes(self, rng, count, user_ids, tag_ids):
+        recipe_tags = [
+            rng.sample(tag_ids, rng.randint(1, min(3, len(tag_ids))))
+            for _ in range(count)
+        ]
+        self.bulk_create(Recipe, [
+            Recipe(
+                author_id=rng.choice(user_ids),
+                name=' '.join(rng.sample(WORDS, 3)).capitalize(),
+                text=' '.join(rng.choices(WORDS, k=30)),
+                image='recipes/bench.png',
+                cooking_time=rng.randint(5, 180),
+                tags_mask=get_tags_mask(tags),
+            )
+            for tags in recipe_tags
+        ])
+        recipe_ids = list(Recipe.objects.filter(
+            author_id__in=user_ids
+        ).order_by('id').values_list('id', flat=True))
+        self.bulk_create(RecipeTag, [
+            RecipeTag(recipe_id=recipe_id, tag_id=tag_id)
+            for recipe_id, tags in zip(recipe_ids, recipe_tags)
+            for tag_id in tags
+        ])
+        return recipe_ids
+
+    def create_ingredients(self, rng, recipe_ids):
+        ingredient_ids = list(
+            Ingredient.objects.order_by('id').values_list('id', flat=True))
+        self.bulk_create(RecipeIngredient, [
+            RecipeIngredient(recipe_id=recipe_id, ingredient_id=ingredient_id,
+                             amount=rng.randint(1, 500))
+            for recipe_id in recipe_ids
+            for ingredient_id in rng.sample(ingredient_ids, rng.randint(3, 12))
+        ])
+
+    def create_relations(self, rng, options, user_ids, recipe_ids):
+        for model, limit in ((Favorite, options['favorites']),
+                             (ShoppingCart, options['cart'])):
+            self.bulk_create(model, [
+                model(user_id=user_id, recipe_id=recipe_id)
+                for user_id in user_ids
+                for recipe_id in rng.sample(
+                    recipe_ids, rng.randint(0, min(limit, len(recipe_ids))))
+            ])
+        subscriptions = [
+            (user_id, author_id)
+            for user_id in user_ids
+            for author_id in rng.sample(user_ids, rng.randint(
+                0, min(options['subscriptions'], len(user_ids))))
+            if author_id != user_id
+        ]
+        self.bulk_create(Subscribe, [
+            Subscribe(user_id=user_id, author_id=author_id)
+            for user_id, author_id in subscriptions
+        ])
+        return subscriptions
+
+    def create_feeds(self, subscriptions):
+        recipes_by_author = defaultdict(list)
+        for recipe_id, author_id in Recipe.objects.filter(
+                author_id__in={author for _, author in subscriptions}
+        ).values_list('id', 'author_id'):
+            recipes_by_author[author_id].append(recipe_id)
+        feeds = defaultdict(list)
+        for user_id, author_id in subscriptions:
+            feeds[user_id].extend(recipes_by_author[author_id])
+        self.bulk_create(FeedItem, [
+            FeedItem(user_id=user_id, recipe_id=recipe_id)
+            for user_id, recipe_ids in feeds.items()
+            for recipe_id in sorted(
+                recipe_ids, reverse=True)[:settings.FEED_MAX_LENGTH]
+        ])
+
+    def handle(self, *args, **options):
+        start = time.monotonic()
+        generated = User.objects.filter(username__startswith=USERNAME_PREFIX)
+        if generated.exists():
+            if not options['clear']:
+                raise CommandError(
+                    'Dataset already exists, use --clear to regenerate it')
+            generated.delete()
+        if not Ingredient.objects.exists():
+            call_command('data_loading')
+        rng = random.Random(options['seed'])
+        with transaction.atomic():
+            tag_ids = self.create_tags()
+            user_ids = self.create_users(options['users'])
+            recipe_ids = self.create_recipes(
+                rng, options['recipes'], user_ids, tag_ids)
+            self.create_ingredients(rng, recipe_ids)
+            subscriptions = self.create_relations(
+                rng, options, user_ids, recipe_ids)
+            self.create_feeds(subscriptions)
+        call_command('reconcile_counters', stdout=self.stdout)
+        call_command('shopping_list_totals', stdout=self.stdout)
+        bump_catalog_version()
+        bump_recipes_version()
+        reset_coverage()
+        self.stdout.write(self.style.SUCCESS(
+            f'Dataset generated in {time.monotonic() - start:.2f}s'))
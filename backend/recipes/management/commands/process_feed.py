@@ -0,0 +1,13 @@
+from recipes.feed import fan_out
+from recipes.jobs import JobWorkerCommand
+from recipes.models import FeedJob
+
+
+class Command(JobWorkerCommand):
+    help = 'Fan out new recipes to the feeds of author followers'
+    model = FeedJob
+
+    def process(self, job):
+        fanned_out = fan_out(job.recipe)
+        mode = 'fanned out' if fanned_out else 'left for fan-out on read'
+        self.finish(job, f'done: recipe {job.recipe_id} {mode}')
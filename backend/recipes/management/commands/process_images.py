@@ -0,0 +1,34 @@
+from django.db import transaction
+from recipes.images import delete_variants, generate_variants
+from recipes.jobs import JobWorkerCommand
+from recipes.models import ImageJob, Recipe
+
+
+class Command(JobWorkerCommand):
+    help = 'Process queued recipe image jobs'
+    model = ImageJob
+
+    def is_current(self, job):
+        return Recipe.objects.filter(
+            pk=job.recipe_id, image=job.image).exists()
+
+    def process(self, job):
+        if not self.is_current(job):
+            self.finish(job, f'superseded: {job.image}')
+            return
+        generate_variants(job.image)
+        with transaction.atomic():
+            recipe = Recipe.objects.select_for_update().filter(
+                pk=job.recipe_id, image=job.image).first()
+            if recipe is not None:
+                previous = recipe.image_variants_of
+                recipe.image_variants_of = job.image
+                recipe.save(update_fields=('image_variants_of',))
+        if recipe is None:
+            # Картинку заменили, пока готовились копии.
+            delete_variants(job.image)
+            self.finish(job, f'superseded: {job.image}')
+            return
+        if previous and previous != job.image:
+            delete_variants(previous)
+        self.finish(job, f'done: {job.image}')
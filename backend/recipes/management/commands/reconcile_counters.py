@@ -0,0 +1,36 @@
+from django.core.management import BaseCommand
+from django.db.models import Count, F, OuterRef, Subquery
+from recipes.models import Recipe
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = 'Recount favorites, shopping cart, recipes and followers counters'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verify', action='store_true',
+            help='Only report drift without fixing it',
+        )
+
+    def reconcile(self, model, field, relation, verify):
+        actual = Subquery(
+            model.objects.filter(pk=OuterRef('pk')).annotate(
+                count=Count(relation)).values('count')
+        )
+        drifted = list(model.objects.annotate(actual=actual).exclude(
+            **{field: F('actual')}).values_list('pk', flat=True))
+        if drifted and not verify:
+            model.objects.filter(pk__in=drifted).update(**{field: actual})
+        self.stdout.write(
+            f'{model.__name__}.{field}: {len(drifted)} drifted')
+
+    def handle(self, *args, **options):
+        for model, field, relation in (
+            (Recipe, 'favorites_count', 'favorite'),
+            (Recipe, 'shopping_cart_count', 'shopping_cart'),
+            (User, 'recipes_count', 'user_recipes'),
+            (User, 'followers_count', 'subscribing'),
+        ):
+            self.reconcile(model, field, relation, options['verify'])
+        self.stdout.write(self.style.SUCCESS('Successfully'))
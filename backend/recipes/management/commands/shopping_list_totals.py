@@ -0,0 +1,54 @@
+from django.core.management import BaseCommand
+from django.db import transaction
+from django.db.models import Sum
+from recipes.models import RecipeIngredient, ShoppingListItem
+
+
+class Command(BaseCommand):
+    help = 'Rebuild or verify shopping list totals'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verify', action='store_true',
+            help='Only report drift without fixing it',
+        )
+
+    def handle(self, *args, **options):
+        expected = {
+            (row['recipe__shopping_cart__user'], row['ingredient']):
+                row['amount']
+            for row in RecipeIngredient.objects.filter(
+                recipe__shopping_cart__isnull=False
+            ).values(
+                'recipe__shopping_cart__user', 'ingredient'
+            ).annotate(amount=Sum('amount')).order_by()
+        }
+        actual = {
+            (item.user_id, item.ingredient_id): item
+            for item in ShoppingListItem.objects.all()
+        }
+        missing = [key for key in expected if key not in actual]
+        extra = [item for key, item in actual.items() if key not in expected]
+        wrong = [
+            item for key, item in actual.items()
+            if key in expected and item.amount != expected[key]
+        ]
+        self.stdout.write(
+            f'Missing: {len(missing)}, extra: {len(extra)}, '
+            f'wrong amount: {len(wrong)}'
+        )
+        if options['verify'] or not (missing or extra or wrong):
+            return
+        with transaction.atomic():
+            ShoppingListItem.objects.filter(
+                pk__in=[item.pk for item in extra]).delete()
+            for item in wrong:
+                item.amount = expected[(item.user_id, item.ingredient_id)]
+            ShoppingListItem.objects.bulk_update(wrong, ['amount'])
+            ShoppingListItem.objects.bulk_create([
+                ShoppingListItem(
+                    user_id=user_id, ingredient_id=ingredient_id,
+                    amount=expected[(user_id, ingredient_id)])
+                for user_id, ingredient_id in missing
+            ])
+        self.stdout.write(self.style.SUCCESS('Successfully'))
@@ -0,0 +1,62 @@
+# Generated by Django 2.2.19 on 2026-10-18 03:55
+
+from collections import defaultdict
+
+from django.db import migrations, models
+
+
+def merge_duplicate_ingredients(apps, schema_editor):
+    """Сливает ингредиенты с одинаковыми названием и единицей измерения
+    в строку с наименьшим id. Строки рецептов и списков покупок,
+    оказавшиеся у одного владельца, объединяются с суммой количеств"""
+    Ingredient = apps.get_model('recipes', 'Ingredient')
+    RecipeIngredient = apps.get_model('recipes', 'RecipeIngredient')
+    ShoppingListItem = apps.get_model('recipes', 'ShoppingListItem')
+    duplicates = Ingredient.objects.values(
+        'name', 'measurement_unit'
+    ).annotate(
+        count=models.Count('id'), keep=models.Min('id')
+    ).filter(count__gt=1).order_by()
+    for group in duplicates:
+        keep = group['keep']
+        merged = list(Ingredient.objects.filter(
+            name=group['name'], measurement_unit=group['measurement_unit']
+        ).exclude(pk=keep).values_list('pk', flat=True))
+        for model, owner in ((RecipeIngredient, 'recipe_id'),
+                             (ShoppingListItem, 'user_id')):
+            rows = defaultdict(list)
+            for row in model.objects.filter(
+                    ingredient_id__in=[keep, *merged]).order_by('pk'):
+                rows[getattr(row, owner)].append(row)
+            for first, *rest in rows.values():
+                if rest:
+                    # Лишние строки удаляются до переноса первой:
+                    # иначе сработает unique_shopping_list_item.
+                    model.objects.filter(
+                        pk__in=[row.pk for row in rest]).delete()
+                    first.amount += sum(row.amount for row in rest)
+                elif first.ingredient_id == keep:
+                    continue
+                first.ingredient_id = keep
+                first.save(update_fields=['ingredient', 'amount'])
+        Ingredient.objects.filter(pk__in=merged).delete()
+    if schema_editor.connection.vendor == 'postgresql':
+        # Отложенные проверки внешних ключей должны сработать до
+        # ALTER TABLE, иначе PostgreSQL откажет из-за pending trigger events.
+        schema_editor.execute('SET CONSTRAINTS ALL IMMEDIATE')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0006_shoppinglistitem'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            merge_duplicate_ingredients, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='ingredient',
+            constraint=models.UniqueConstraint(fields=('name', 'measurement_unit'), name='unique_ingredient'),
+        ),
+    ]
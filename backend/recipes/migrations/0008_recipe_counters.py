@@ -0,0 +1,34 @@
+# Generated by Django 2.2.19 on 2026-10-18 04:00
+
+from django.db import migrations, models
+
+
+def fill_counters(apps, schema_editor):
+    Recipe = apps.get_model('recipes', 'Recipe')
+    for field, relation in (('favorites_count', 'favorite'),
+                            ('shopping_cart_count', 'shopping_cart')):
+        Recipe.objects.update(**{field: models.Subquery(
+            Recipe.objects.filter(pk=models.OuterRef('pk')).annotate(
+                count=models.Count(relation)).values('count')
+        )})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0007_ingredient_unique'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='favorites_count',
+            field=models.PositiveIntegerField(db_index=True, default=0, editable=False, verbose_name='В избранном'),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='shopping_cart_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='В корзинах'),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 2.2.19 on 2026-10-18 09:00
+
+from collections import defaultdict
+
+from django.db import migrations, models
+
+TAGS_MASK_BITS = 63
+
+
+def fill_tags_mask(apps, schema_editor):
+    Recipe = apps.get_model('recipes', 'Recipe')
+    RecipeTag = apps.get_model('recipes', 'RecipeTag')
+    masks = defaultdict(int)
+    for recipe_id, tag_id in RecipeTag.objects.values_list(
+            'recipe_id', 'tag_id'):
+        if 1 <= tag_id <= TAGS_MASK_BITS:
+            masks[recipe_id] |= 1 << (tag_id - 1)
+    by_mask = defaultdict(list)
+    for recipe_id, mask in masks.items():
+        by_mask[mask].append(recipe_id)
+    for mask, ids in by_mask.items():
+        Recipe.objects.filter(pk__in=ids).update(tags_mask=mask)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0010_recipe_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='tags_mask',
+            field=models.BigIntegerField(db_index=True, default=0, editable=False, verbose_name='Битовая маска тегов'),
+        ),
+        migrations.RunPython(fill_tags_mask, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 2.2.19 on 2026-10-18 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0012_feed'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BootState',
+            fields=[
+                ('name', models.CharField(max_length=50, primary_key=True, serialize=False, verbose_name='Шаг')),
+                ('checksum', models.CharField(max_length=64, verbose_name='Контрольная сумма')),
+                ('updated', models.DateTimeField(auto_now=True, verbose_name='Обновлено')),
+            ],
+            options={
+                'verbose_name': 'Состояние запуска',
+                'verbose_name_plural': 'Состояния запуска',
+            },
+        ),
+    ]
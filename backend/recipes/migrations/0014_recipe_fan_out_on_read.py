@@ -0,0 +1,35 @@
+# Generated by Django 2.2.19 on 2026-10-18 04:59
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def mark_hot_authors(apps, schema_editor):
+    """Рецепты авторов, которые уже рассылаются при чтении,
+    по-прежнему подмешиваются в ленты подписчиков"""
+    Recipe = apps.get_model('recipes', 'Recipe')
+    Subscribe = apps.get_model('users', 'Subscribe')
+    hot_authors = Subscribe.objects.values('author_id').annotate(
+        followers=models.Count('id')
+    ).filter(
+        followers__gt=settings.FEED_FANOUT_MAX_FOLLOWERS
+    ).values('author_id')
+    Recipe.objects.filter(author_id__in=hot_authors).update(
+        fan_out_on_read=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0013_bootstate'),
+        ('users', '0003_user_recipes_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='fan_out_on_read',
+            field=models.BooleanField(default=False, editable=False, verbose_name='Рассылается при чтении'),
+        ),
+        migrations.RunPython(mark_hot_authors, migrations.RunPython.noop),
+    ]
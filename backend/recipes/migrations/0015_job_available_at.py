@@ -0,0 +1,24 @@
+# Generated by Django 2.2.19 on 2026-10-18 05:01
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0014_recipe_fan_out_on_read'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='feedjob',
+            name='available_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, verbose_name='Доступна с'),
+        ),
+        migrations.AddField(
+            model_name='imagejob',
+            name='available_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, verbose_name='Доступна с'),
+        ),
+    ]
@@ -2,6 +2,9 @@ from django.contrib.auth import get_user_model
 from django.core.validators import (MaxValueValidator, MinValueValidator,
                                     RegexValidator)
 from django.db import models
+from django.utils import timezone
+
+from .ranking import RankedQuerySet
 
 User = get_user_model()
 
@@ -22,6 +25,12 @@ class Recipe(models.Model):
         upload_to='recipes/',
         verbose_name='Картинка',
     )
+    image_variants_of = models.CharField(
+        max_length=100,
+        blank=True,
+        editable=False,
+        verbose_name='Картинка, для которой готовы уменьшенные копии',
+    )
     text = models.TextField(
         verbose_name='Описание',
         max_length=2000
@@ -48,6 +57,30 @@ class Recipe(models.Model):
         ],
         verbose_name='Время приготовления (в минутах)',
     )
+    favorites_count = models.PositiveIntegerField(
+        default=0,
+        db_index=True,
+        editable=False,
+        verbose_name='В избранном',
+    )
+    shopping_cart_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='В корзинах',
+    )
+    tags_mask = models.BigIntegerField(
+        default=0,
+        db_index=True,
+        editable=False,
+        verbose_name='Битовая маска тегов',
+    )
+    fan_out_on_read = models.BooleanField(
+        default=False,
+        editable=False,
+        verbose_name='Рассылается при чтении',
+    )
+
+    objects = RankedQuerySet.as_manager()
 
     class Meta:
         verbose_name = 'Рецепт'
@@ -108,6 +141,12 @@ class Ingredient(models.Model):
         verbose_name = 'Ингредиент'
         verbose_name_plural = 'Ингредиенты'
         ordering = ('name',)
+        constraints = [
+            models.UniqueConstraint(
+                fields=['name', 'measurement_unit'],
+                name='unique_ingredient'
+            )
+        ]
 
     def __str__(self):
         return self.name
@@ -200,3 +239,153 @@ class ShoppingCart(models.Model):
                 fields=['user', 'recipe'], name='unique_shopping_cart'
             )
         ]
+
+
+class ShoppingListItem(models.Model):
+    """Модель суммарного количества ингредиента в списке покупок
+    пользователя, поддерживаемая при изменении продуктовой корзины"""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='shopping_list',
+        verbose_name='Пользователь',
+    )
+    ingredient = models.ForeignKey(
+        Ingredient,
+        on_delete=models.CASCADE,
+        related_name='shopping_list',
+        verbose_name='Ингредиент',
+    )
+    amount = models.IntegerField(
+        verbose_name='Количество',
+    )
+
+    class Meta:
+        verbose_name = 'Позиция списка покупок'
+        verbose_name_plural = 'Списки покупок'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'ingredient'], name='unique_shopping_list_item'
+            )
+        ]
+
+
+class Job(models.Model):
+    """Абстрактная модель задачи фоновой очереди. Упавшая задача
+    возвращается в очередь не раньше available_at"""
+    PENDING = 'pending'
+    DONE = 'done'
+    FAILED = 'failed'
+
+    STATUSES = (
+        (PENDING, 'В очереди'),
+        (DONE, 'Готово'),
+        (FAILED, 'Ошибка'),
+    )
+
+    status = models.CharField(
+        max_length=10,
+        choices=STATUSES,
+        default=PENDING,
+        db_index=True,
+        verbose_name='Статус',
+    )
+    attempts = models.PositiveSmallIntegerField(
+        default=0,
+        verbose_name='Попытки',
+    )
+    error = models.TextField(
+        blank=True,
+        verbose_name='Ошибка',
+    )
+    available_at = models.DateTimeField(
+        default=timezone.now,
+        verbose_name='Доступна с',
+    )
+    created = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Создана',
+    )
+
+    class Meta:
+        abstract = True
+        ordering = ('id',)
+
+
+class ImageJob(Job):
+    """Модель задачи на подготовку уменьшенных копий картинки рецепта"""
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='image_jobs',
+        verbose_name='Рецепт',
+    )
+    image = models.CharField(
+        max_length=100,
+        verbose_name='Картинка',
+    )
+
+    class Meta(Job.Meta):
+        verbose_name = 'Обработка картинки'
+        verbose_name_plural = 'Обработка картинок'
+
+
+class FeedItem(models.Model):
+    """Модель записи в ленте подписок пользователя"""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='feed',
+        verbose_name='Пользователь',
+    )
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='feed_items',
+        verbose_name='Рецепт',
+    )
+
+    class Meta:
+        verbose_name = 'Запись ленты'
+        verbose_name_plural = 'Лента подписок'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'recipe'],
+                name='unique_feed_item'
+            )
+        ]
+
+
+class FeedJob(Job):
+    """Модель задачи на рассылку рецепта в ленты подписчиков автора"""
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='feed_jobs',
+        verbose_name='Рецепт',
+    )
+
+    class Meta(Job.Meta):
+        verbose_name = 'Рассылка в ленты'
+        verbose_name_plural = 'Рассылки в ленты'
+
+
+class BootState(models.Model):
+    """Модель контрольных сумм шагов запуска контейнера"""
+    name = models.CharField(
+        max_length=50,
+        primary_key=True,
+        verbose_name='Шаг',
+    )
+    checksum = models.CharField(
+        max_length=64,
+        verbose_name='Контрольная сумма',
+    )
+    updated = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Обновлено',
+    )
+
+    class Meta:
+        verbose_name = 'Состояние запуска'
+        verbose_name_plural = 'Состояния запуска'
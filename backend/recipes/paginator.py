@@ -1,6 +1,69 @@
-from rest_framework.pagination import PageNumberPagination
+from django.conf import settings
+from rest_framework.pagination import (BasePagination, CursorPagination,
+                                       PageNumberPagination)
+
+from .ranking import RankedResults
 
 
 class CustomPageNumberPaginator(PageNumberPagination):
     page_size = 6
     page_size_query_param = 'limit'
+    max_page_size = settings.MAX_PAGE_SIZE
+
+
+class CustomCursorPaginator(CursorPagination):
+    """Keyset-пагинация по -id без COUNT(*) и OFFSET"""
+    page_size = 6
+    page_size_query_param = 'limit'
+    max_page_size = settings.MAX_PAGE_SIZE
+    ordering = '-id'
+
+
+class PageNumberOrCursorPaginator(BasePagination):
+    """Пагинация страницами (page, limit) или курсором,
+    если в запросе передан параметр cursor. Ранжированная выдача
+    (поиск, подбор по ингредиентам) всегда делится на страницы:
+    курсор упорядочил бы ее по -id"""
+    def __init__(self):
+        self.page_number_paginator = CustomPageNumberPaginator()
+        self.cursor_paginator = CustomCursorPaginator()
+        self.paginator = self.page_number_paginator
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.paginator = self.page_number_paginator
+        if getattr(queryset, 'ranks', None) is not None:
+            queryset = RankedResults(queryset)
+        elif (self.cursor_paginator.cursor_query_param in request.query_params
+              and not self.is_ranked(queryset)):
+            self.paginator = self.cursor_paginator
+        return self.paginator.paginate_queryset(queryset, request, view)
+
+    def is_ranked(self, queryset):
+        """Упорядочен ли запрос иначе, чем курсор, например
+        по релевантности полнотекстового поиска PostgreSQL"""
+        order_by = tuple(queryset.query.order_by)
+        return bool(order_by) and order_by != (
+            self.cursor_paginator.ordering,)
+
+    def get_paginated_response(self, data):
+        return self.paginator.get_paginated_response(data)
+
+    def get_paginated_response_schema(self, schema):
+        return self.page_number_paginator.get_paginated_response_schema(
+            schema)
+
+    def to_html(self):
+        return self.paginator.to_html()
+
+    def get_results(self, data):
+        return self.paginator.get_results(data)
+
+    def get_schema_fields(self, view):
+        return (self.page_number_paginator.get_schema_fields(view)
+                + self.cursor_paginator.get_schema_fields(view)[:1])
+
+    def get_schema_operation_parameters(self, view):
+        return (
+            self.page_number_paginator.get_schema_operation_parameters(view)
+            + self.cursor_paginator.get_schema_operation_parameters(view)[:1]
+        )
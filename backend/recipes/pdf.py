@@ -0,0 +1,277 @@
+import re
+import struct
+import zlib
+from functools import lru_cache
+from os import path
+
+PAGE_WIDTH = 595
+PAGE_HEIGHT = 842
+MARGIN = 50
+FONT_SIZE = 11
+TITLE_SIZE = 16
+LEADING = 16
+
+
+class TrueTypeFont:
+    """Метрики и таблица символов шрифта TrueType, нужные для
+    встраивания его в PDF целиком с кодировкой Identity-H"""
+    def __init__(self, font_path):
+        with open(font_path, 'rb') as font_file:
+            self.data = font_file.read()
+        self.name = re.sub(
+            r'[^A-Za-z0-9-]', '', path.splitext(path.basename(font_path))[0])
+        self.tables = {}
+        num_tables, = struct.unpack_from('>H', self.data, 4)
+        for number in range(num_tables):
+            tag, _, offset, _ = struct.unpack_from(
+                '>4sIII', self.data, 12 + 16 * number)
+            self.tables[tag.decode('latin-1')] = offset
+        head = self.tables['head']
+        self.units_per_em, = struct.unpack_from('>H', self.data, head + 18)
+        self.bbox = struct.unpack_from('>4h', self.data, head + 36)
+        hhea = self.tables['hhea']
+        self.ascent, self.descent = struct.unpack_from(
+            '>2h', self.data, hhea + 4)
+        num_metrics, = struct.unpack_from('>H', self.data, hhea + 34)
+        self.advances = [
+            struct.unpack_from('>H', self.data, self.tables['hmtx'] + 4 * i)[0]
+            for i in range(num_metrics)
+        ]
+        self.cmap = self.read_cmap()
+        self.compressed = zlib.compress(self.data)
+
+    def read_cmap(self):
+        cmap = self.tables['cmap']
+        num_tables, = struct.unpack_from('>H', self.data, cmap + 2)
+        subtables = {}
+        for number in range(num_tables):
+            platform, encoding, offset = struct.unpack_from(
+                '>HHI', self.data, cmap + 4 + 8 * number)
+            subtables[platform, encoding] = cmap + offset
+        if (3, 10) in subtables:
+            return self.read_cmap_format_12(subtables[3, 10])
+        return self.read_cmap_format_4(
+            subtables.get((3, 1), subtables.get((0, 3))))
+
+    def read_cmap_format_12(self, offset):
+        groups, = struct.unpack_from('>I', self.data, offset + 12)
+        cmap = {}
+        for number in range(groups):
+            start, end, glyph = struct.unpack_from(
+                '>III', self.data, offset + 16 + 12 * number)
+            for code in range(start, end + 1):
+                cmap[code] = glyph + code - start
+        return cmap
+
+    def read_cmap_format_4(self, offset):
+        segments = struct.unpack_from('>H', self.data, offset + 6)[0] // 2
+        ends = offset + 14
+        starts = ends + 2 * segments + 2
+        deltas = starts + 2 * segments
+        range_offsets = deltas + 2 * segments
+        cmap = {}
+        for number in range(segments):
+            end, = struct.unpack_from('>H', self.data, ends + 2 * number)
+            start, = struct.unpack_from('>H', self.data, starts + 2 * number)
+            delta, = struct.unpack_from('>h', self.data, deltas + 2 * number)
+            position = range_offsets + 2 * number
+            range_offset, = struct.unpack_from('>H', self.data, position)
+            for code in range(start, min(end, 0xFFFE) + 1):
+                if range_offset == 0:
+                    glyph = (code + delta) & 0xFFFF
+                else:
+                    glyph, = struct.unpack_from(
+                        '>H', self.data,
+                        position + range_offset + 2 * (code - start))
+                    if glyph:
+                        glyph = (glyph + delta) & 0xFFFF
+                if glyph:
+                    cmap[code] = glyph
+        return cmap
+
+    def scale(self, value):
+        return round(value * 1000 / self.units_per_em)
+
+    def glyph_width(self, glyph):
+        return self.scale(self.advances[min(glyph, len(self.advances) - 1)])
+
+
+@lru_cache(maxsize=None)
+def load_font(font_path):
+    return TrueTypeFont(font_path)
+
+
+class PdfWriter:
+    """Минимальный инкрементальный писатель PDF: объекты отдаются
+    по мере готовности, а их смещения собираются для таблицы xref
+    в конце файла. Объекты могут ссылаться на еще не записанные"""
+    def __init__(self):
+        self.position = 0
+        self.offsets = {}
+        self.count = 0
+
+    def reserve(self):
+        self.count += 1
+        return self.count
+
+    def write(self, data):
+        self.position += len(data)
+        return data
+
+    def header(self):
+        return self.write(b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n')
+
+    def object(self, number, body):
+        self.offsets[number] = self.position
+        return self.write(b'%d 0 obj\n%s\nendobj\n' % (number, body))
+
+    def stream(self, number, data, entries=b''):
+        return self.object(number, b'<< /Length %d %s>>\nstream\n%s\n'
+                                   b'endstream' % (len(data), entries, data))
+
+    def trailer(self, root):
+        xref = self.position
+        lines = [b'xref\n0 %d\n' % (self.count + 1),
+                 b'0000000000 65535 f \n']
+        lines += [b'%010d 00000 n \n' % self.offsets[number]
+                  for number in range(1, self.count + 1)]
+        lines.append(b'trailer\n<< /Size %d /Root %d 0 R >>\n'
+                     b'startxref\n%d\n%%%%EOF\n'
+                     % (self.count + 1, root, xref))
+        return self.write(b''.join(lines))
+
+
+class PdfDocument:
+    """Документ из строк текста, который отдается по страницам:
+    в памяти держится только текущая страница. Шрифт встраивается
+    в конце, когда известны все использованные глифы"""
+    def __init__(self, font_path):
+        self.font = load_font(font_path)
+        self.writer = PdfWriter()
+        self.catalog = self.writer.reserve()
+        self.pages = self.writer.reserve()
+        self.font_object = self.writer.reserve()
+        self.page_objects = []
+        self.used = {}
+
+    def encode(self, text):
+        glyphs = []
+        for char in text:
+            glyph = self.font.cmap.get(ord(char), 0)
+            self.used.setdefault(glyph, char)
+            glyphs.append(b'%04X' % glyph)
+        return b'<%s>' % b''.join(glyphs)
+
+    def wrap(self, text, size):
+        """Разбивает строку по ширине страницы"""
+        width = (PAGE_WIDTH - 2 * MARGIN) * 1000 / size
+        lines, line, line_width = [], '', 0
+        for char in text:
+            char_width = self.font.glyph_width(
+                self.font.cmap.get(ord(char), 0))
+            if line and line_width + char_width > width:
+                lines.append(line)
+                line, line_width = '', 0
+            line += char
+            line_width += char_width
+        lines.append(line)
+        return lines
+
+    def page(self, content):
+        content_object = self.writer.reserve()
+        page_object = self.writer.reserve()
+        self.page_objects.append(page_object)
+        yield self.writer.stream(
+            content_object, zlib.compress(b'BT\n%s\nET' % content),
+            b'/Filter /FlateDecode ')
+        yield self.writer.object(page_object, (
+            b'<< /Type /Page /Parent %d 0 R /MediaBox [0 0 %d %d] '
+            b'/Resources << /Font << /F1 %d 0 R >> >> /Contents %d 0 R >>'
+            % (self.pages, PAGE_WIDTH, PAGE_HEIGHT, self.font_object,
+               content_object)))
+
+    def render(self, title, lines):
+        """Отдает файл кусками по мере заполнения страниц"""
+        yield self.writer.header()
+        top = PAGE_HEIGHT - MARGIN - TITLE_SIZE
+        content = [b'/F1 %d Tf %d %d Td %s Tj' % (
+            TITLE_SIZE, MARGIN, top, self.encode(title))]
+        content.append(b'/F1 %d Tf %d TL 0 %d Td' % (
+            FONT_SIZE, LEADING, -2 * LEADING))
+        free = (top - 2 * LEADING - MARGIN) // LEADING
+        for text in lines:
+            for line in self.wrap(text, FONT_SIZE):
+                if not free:
+                    yield from self.page(b'\n'.join(content))
+                    content = [b'/F1 %d Tf %d TL %d %d Td' % (
+                        FONT_SIZE, LEADING, MARGIN,
+                        PAGE_HEIGHT - MARGIN - FONT_SIZE)]
+                    free = (PAGE_HEIGHT - 2 * MARGIN) // LEADING
+                content.append(b'%s Tj T*' % self.encode(line))
+                free -= 1
+        yield from self.page(b'\n'.join(content))
+        yield from self.font_objects()
+        yield self.writer.object(self.pages, (
+            b'<< /Type /Pages /Kids [%s] /Count %d >>' % (
+                b' '.join(b'%d 0 R' % number for number in self.page_objects),
+                len(self.page_objects))))
+        yield self.writer.object(
+            self.catalog, b'<< /Type /Catalog /Pages %d 0 R >>' % self.pages)
+        yield self.writer.trailer(self.catalog)
+
+    def font_objects(self):
+        font = self.font
+        writer = self.writer
+        cid_font, descriptor, font_file, to_unicode = (
+            writer.reserve() for _ in range(4))
+        glyphs = sorted(self.used)
+        yield writer.object(self.font_object, (
+            b'<< /Type /Font /Subtype /Type0 /BaseFont /%s '
+            b'/Encoding /Identity-H /DescendantFonts [%d 0 R] '
+            b'/ToUnicode %d 0 R >>'
+            % (font.name.encode(), cid_font, to_unicode)))
+        widths = b' '.join(
+            b'%d [%d]' % (glyph, font.glyph_width(glyph)) for glyph in glyphs)
+        yield writer.object(cid_font, (
+            b'<< /Type /Font /Subtype /CIDFontType2 /BaseFont /%s '
+            b'/CIDSystemInfo << /Registry (Adobe) /Ordering (Identity) '
+            b'/Supplement 0 >> /FontDescriptor %d 0 R '
+            b'/CIDToGIDMap /Identity /W [%s] >>'
+            % (font.name.encode(), descriptor, widths)))
+        yield writer.object(descriptor, (
+            b'<< /Type /FontDescriptor /FontName /%s /Flags 32 '
+            b'/FontBBox [%s] /ItalicAngle 0 /Ascent %d /Descent %d '
+            b'/CapHeight %d /StemV 80 /FontFile2 %d 0 R >>'
+            % (font.name.encode(),
+               b' '.join(b'%d' % font.scale(value) for value in font.bbox),
+               font.scale(font.ascent), font.scale(font.descent),
+               font.scale(font.ascent), font_file)))
+        yield writer.stream(
+            font_file, font.compressed,
+            b'/Length1 %d /Filter /FlateDecode ' % len(font.data))
+        yield writer.stream(to_unicode, self.to_unicode(glyphs))
+
+    def to_unicode(self, glyphs):
+        """CMap глиф -> Юникод для копирования и поиска текста"""
+        blocks = []
+        for start in range(0, len(glyphs), 100):
+            chunk = glyphs[start:start + 100]
+            blocks.append(b'%d beginbfchar\n%s\nendbfchar' % (
+                len(chunk), b'\n'.join(
+                    b'<%04X> <%s>' % (
+                        glyph, self.used[glyph].encode('utf-16-be').hex()
+                        .upper().encode())
+                    for glyph in chunk)))
+        return (
+            b'/CIDInit /ProcSet findresource begin\n12 dict begin\n'
+            b'begincmap\n/CIDSystemInfo << /Registry (Adobe) '
+            b'/Ordering (UCS) /Supplement 0 >> def\n'
+            b'/CMapName /Adobe-Identity-UCS def\n/CMapType 2 def\n'
+            b'1 begincodespacerange\n<0000> <FFFF>\nendcodespacerange\n'
+            b'%s\nendcmap\nCMapName currentdict /CMap defineresource pop\n'
+            b'end\nend' % b'\n'.join(blocks))
+
+
+def render_pdf(title, lines, font_path):
+    """Потоково формирует PDF со строками lines шрифтом font_path"""
+    return PdfDocument(font_path).render(title, lines)
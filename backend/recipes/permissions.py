@@ -1,11 +1,24 @@
 from rest_framework import permissions
+from users.models import User
 
 
 class IsAuthorOrAdmin(permissions.BasePermission):
-    """Разрешения изменений для авторов и админов"""
+    """Разрешения изменений для авторов и админов.
+    Роль проверяется по БД, так как пользователь
+    мог быть взят из кэша токенов"""
     def has_object_permission(self, request, view, obj):
-        if request.user.is_authenticated:
-            if (request.user.is_admin
-               or obj.author == request.user):
-                return True
-        return request.method in permissions.SAFE_METHODS
+        if request.method in permissions.SAFE_METHODS:
+            return True
+        if not request.user.is_authenticated:
+            return False
+        if obj.author_id == request.user.pk:
+            return True
+        user = User.objects.only('role', 'is_superuser').filter(
+            pk=request.user.pk).first()
+        return user is not None and user.is_admin
+
+
+class IsAdmin(permissions.BasePermission):
+    """Доступ только для админов"""
+    def has_permission(self, request, view):
+        return request.user.is_authenticated and request.user.is_admin
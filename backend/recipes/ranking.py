@@ -0,0 +1,55 @@
+from django.db import models
+
+
+class RankedQuerySet(models.QuerySet):
+    """QuerySet, который может нести ранги, посчитанные в памяти
+    процесса (подбор по ингредиентам, поиск без PostgreSQL).
+    Ранги не попадают в SQL: RankedResults сортирует id в Python
+    и загружает из базы только рецепты страницы"""
+    ranks = None
+
+    def _clone(self):
+        clone = super()._clone()
+        clone.ranks = self.ranks
+        return clone
+
+    def rank(self, ranks):
+        """Оставляет объекты из словаря {id: ранг} и упорядочивает
+        их по убыванию ранга, затем id. Повторное ранжирование
+        сужает выборку и сортирует по последним рангам"""
+        clone = self._chain()
+        if clone.ranks is not None:
+            ranks = {pk: rank for pk, rank in ranks.items()
+                     if pk in clone.ranks}
+        clone.ranks = ranks
+        return clone
+
+    def get_ranked_ids(self):
+        """Возвращает id в порядке рангов с учетом остальных фильтров"""
+        ids = self.ranks.keys()
+        if self.query.has_filters():
+            ids = ids & set(self.order_by().values_list('pk', flat=True))
+        return sorted(ids, key=lambda pk: (-self.ranks[pk], -pk))
+
+
+class RankedResults:
+    """Последовательность объектов ранжированного QuerySet для
+    пагинатора: count() и срезы без передачи всех id в запрос"""
+    ordered = True
+
+    def __init__(self, queryset):
+        self.queryset = queryset
+        self.ids = queryset.get_ranked_ids()
+
+    def count(self):
+        return len(self.ids)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self.queryset.get(pk=self.ids[index])
+        ids = self.ids[index]
+        objects = self.queryset.in_bulk(ids)
+        return [objects[pk] for pk in ids if pk in objects]
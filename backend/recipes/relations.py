@@ -0,0 +1,101 @@
+import uuid
+from array import array
+from bisect import bisect_left
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from foodgram.db_router import primary
+from users.models import Subscribe
+
+from .models import Favorite, ShoppingCart
+
+RELATIONS_VERSION_KEY = 'user_relations_version:{}'
+RELATIONS_KEY = 'user_relations:{}:{}'
+
+
+def contains(ids, value):
+    position = bisect_left(ids, value)
+    return position < len(ids) and ids[position] == value
+
+
+class UserRelations:
+    """Отсортированные id избранных рецептов, рецептов в корзине
+    и авторов из подписок пользователя"""
+    def __init__(self, favorites=(), cart=(), subscriptions=()):
+        self.favorites = array('I', favorites)
+        self.cart = array('I', cart)
+        self.subscriptions = array('I', subscriptions)
+
+    def is_favorited(self, recipe_id):
+        return contains(self.favorites, recipe_id)
+
+    def is_in_shopping_cart(self, recipe_id):
+        return contains(self.cart, recipe_id)
+
+    def is_subscribed(self, author_id):
+        return contains(self.subscriptions, author_id)
+
+    def dump(self):
+        return (self.favorites.tobytes(), self.cart.tobytes(),
+                self.subscriptions.tobytes())
+
+    @classmethod
+    def load(cls, data):
+        relations = cls()
+        for ids, raw in zip(
+                (relations.favorites, relations.cart,
+                 relations.subscriptions), data):
+            ids.frombytes(raw)
+        return relations
+
+    @classmethod
+    def fetch(cls, user_id):
+        return cls(
+            Favorite.objects.filter(user_id=user_id).order_by(
+                'recipe_id').values_list('recipe_id', flat=True),
+            ShoppingCart.objects.filter(user_id=user_id).order_by(
+                'recipe_id').values_list('recipe_id', flat=True),
+            Subscribe.objects.filter(user_id=user_id).order_by(
+                'author_id').values_list('author_id', flat=True),
+        )
+
+
+EMPTY_RELATIONS = UserRelations()
+
+
+def get_relations_version(user_id):
+    key = RELATIONS_VERSION_KEY.format(user_id)
+    version = cache.get(key)
+    if version is None:
+        version = uuid.uuid4().hex
+        if not cache.add(key, version, None):
+            version = cache.get(key)
+    return version
+
+
+def bump_relations_version(user_id):
+    """Сбрасывает кэш связей пользователя после фиксации транзакции"""
+    transaction.on_commit(lambda: cache.set(
+        RELATIONS_VERSION_KEY.format(user_id), uuid.uuid4().hex, None))
+
+
+def get_user_relations(request):
+    """Возвращает связи текущего пользователя из кэша,
+    один раз за запрос"""
+    if request is None or not request.user.is_authenticated:
+        return EMPTY_RELATIONS
+    relations = getattr(request, 'user_relations', None)
+    if relations is not None:
+        return relations
+    user_id = request.user.pk
+    key = RELATIONS_KEY.format(user_id, get_relations_version(user_id))
+    data = cache.get(key)
+    if data is None:
+        with primary():
+            relations = UserRelations.fetch(user_id)
+        cache.set(key, relations.dump(), settings.USER_RELATIONS_TIMEOUT)
+    else:
+        relations = UserRelations.load(data)
+    request.user_relations = relations
+    return relations
@@ -0,0 +1,93 @@
+import re
+import threading
+from bisect import bisect_left
+from collections import Counter, defaultdict
+
+from django.db import connection
+from django.db.models import BooleanField, FloatField
+from django.db.models.expressions import RawSQL
+from foodgram.db_router import primary
+
+from .caching import get_recipes_version
+from .models import Recipe
+
+SEARCH_CONFIG = 'russian'
+NAME_WEIGHT = 2
+TOKEN_RE = re.compile(r'\w+')
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(text.lower())
+
+
+class RecipeSearchIndex:
+    """Инвертированный индекс рецептов в памяти процесса
+    для баз данных без полнотекстового поиска (SQLite в тестах).
+    Слова запроса сопоставляются с префиксами слов рецепта"""
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.version = None
+        self.tokens = []
+        self.postings = {}
+
+    def build(self, version):
+        postings = defaultdict(Counter)
+        for pk, name, text in Recipe.objects.values_list(
+                'id', 'name', 'text'):
+            for token in tokenize(name):
+                postings[token][pk] += NAME_WEIGHT
+            for token in tokenize(text):
+                postings[token][pk] += 1
+        self.tokens = sorted(postings)
+        self.postings = postings
+        self.version = version
+
+    def refresh(self):
+        version = get_recipes_version()
+        if version != self.version:
+            with self.lock, primary():
+                if version != self.version:
+                    self.build(version)
+
+    def search(self, query):
+        """Возвращает {id рецепта: релевантность} для рецептов,
+        содержащих все слова запроса"""
+        self.refresh()
+        ranks = None
+        for word in tokenize(query):
+            word_ranks = Counter()
+            position = bisect_left(self.tokens, word)
+            while (position < len(self.tokens)
+                   and self.tokens[position].startswith(word)):
+                word_ranks.update(self.postings[self.tokens[position]])
+                position += 1
+            if ranks is None:
+                ranks = word_ranks
+            else:
+                ranks = Counter({
+                    pk: rank + word_ranks[pk]
+                    for pk, rank in ranks.items() if pk in word_ranks
+                })
+        return ranks or {}
+
+
+search_index = RecipeSearchIndex()
+
+
+def search_recipes(queryset, query):
+    """Фильтрует рецепты по поисковому запросу и сортирует
+    по релевантности"""
+    if not tokenize(query):
+        return queryset
+    if connection.vendor == 'postgresql':
+        tsquery = f"plainto_tsquery('{SEARCH_CONFIG}', %s)"
+        table = Recipe._meta.db_table
+        return queryset.annotate(
+            search_match=RawSQL(
+                f'{table}.search_vector @@ {tsquery}', (query,),
+                output_field=BooleanField()),
+            search_rank=RawSQL(
+                f'ts_rank({table}.search_vector, {tsquery})', (query,),
+                output_field=FloatField()),
+        ).filter(search_match=True).order_by('-search_rank', '-id')
+    return queryset.rank(search_index.search(query))
@@ -1,10 +1,16 @@
+from django.db import transaction
 from drf_extra_fields.fields import Base64ImageField
-from jsonschema import ValidationError
+from foodgram.instrumentation import TimedRepresentationMixin
 from rest_framework import serializers
 from users.serializers import CustomUserSerializer
 
-from .models import (Favorite, Ingredient, Recipe, RecipeIngredient,
-                     ShoppingCart, Tag)
+from .catalog import catalog
+from .coverage import record_ingredient_changes
+from .images import get_variant_urls
+from .models import (Favorite, FeedJob, ImageJob, Ingredient, Recipe,
+                     RecipeIngredient, RecipeTag, ShoppingCart, Tag)
+from .relations import get_user_relations
+from .utils import change_recipe_in_shopping_lists, get_tags_mask
 
 
 class IngredientSerializer(serializers.ModelSerializer):
@@ -44,12 +50,23 @@ class TagSerializer(serializers.ModelSerializer):
         lookup_field = 'slug'
 
 
+class RecipeTagsField(serializers.Field):
+    """Теги рецепта, взятые из кэша справочников
+    по связям RecipeTag"""
+    def __init__(self, **kwargs):
+        kwargs['source'] = 'recipe_tag'
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, recipe_tags):
+        return TagSerializer(catalog.get_tags_by_ids(
+            recipe_tag.tag_id for recipe_tag in recipe_tags.all()
+        ), many=True).data
+
+
 class AddRecipeIngredientsSerializer(serializers.ModelSerializer):
     """Сериализатор для продуктов при создании рецепта"""
-    id = serializers.PrimaryKeyRelatedField(
-        queryset=Ingredient.objects.all(),
-        source='ingredient'
-    )
+    id = serializers.IntegerField()
 
     class Meta:
         model = RecipeIngredient
@@ -60,10 +77,7 @@ class AddRecipeSerializer(serializers.ModelSerializer):
     """Сериализатор для рецептов"""
     author = CustomUserSerializer(read_only=True)
     ingredients = AddRecipeIngredientsSerializer(many=True)
-    tags = serializers.PrimaryKeyRelatedField(
-        queryset=Tag.objects.all(),
-        many=True
-    )
+    tags = serializers.ListField(child=serializers.IntegerField())
     cooking_time = serializers.IntegerField()
     image = Base64ImageField(max_length=None, use_url=True)
 
@@ -73,61 +87,51 @@ class AddRecipeSerializer(serializers.ModelSerializer):
                   'image', 'text', 'cooking_time')
 
     def validate_ingredients(self, data):
-        """Валидатор ингридиентов"""
-        ingredients = self.initial_data.get('ingredients')
-        if not ingredients:
+        """Валидатор ингридиентов: все продукты
+        загружаются одним запросом"""
+        if not data:
             raise serializers.ValidationError(
                 'Нужно выбрать минимум 1 ингредиент!')
-        for ingredient in ingredients:
-            try:
-                int(ingredient.get('amount'))
-                if int(ingredient.get('amount')) <= 0:
-                    raise serializers.ValidationError(
-                        'Количество должно быть положительным!')
-            except Exception:
-                raise ValidationError({'amount': 'Колличество должно'
-                                      'быть числом'})
-            check_id = ingredient['id']
-            check_ingredient = Ingredient.objects.filter(id=check_id)
-            if not check_ingredient.exists():
-                raise serializers.ValidationError(
-                    'Данного продукта нет в базе!')
-        return data
+        ingredient_ids = [ingredient['id'] for ingredient in data]
+        if len(ingredient_ids) != len(set(ingredient_ids)):
+            raise serializers.ValidationError(
+                'Ингредиенты должны быть уникальными')
+        ingredients = catalog.ingredients_in_bulk(ingredient_ids)
+        if len(ingredients) != len(ingredient_ids):
+            raise serializers.ValidationError(
+                'Данного продукта нет в базе!')
+        return [{
+            'ingredient': ingredients[ingredient['id']],
+            'amount': ingredient['amount'],
+        } for ingredient in data]
 
     def validate_cooking_time(self, data):
         """Валидатор времени приготовления"""
-        cooking_time = self.initial_data.get('cooking_time')
-        try:
-            int(cooking_time)
-            if int(cooking_time) < 1:
-                raise serializers.ValidationError(
-                    'Время готовки не может быть'
-                    ' меньше 1!')
-            if int(cooking_time) > 600:
-                raise serializers.ValidationError(
-                    'Время готовки не может быть'
-                    ' больше 600!')
-        except Exception:
-            raise serializers.ValidationError({'cooking_time': 'Время'
-                                               ' должно быть больше 0'})
+        if data < 1:
+            raise serializers.ValidationError(
+                'Время готовки не может быть'
+                ' меньше 1!')
+        if data > 600:
+            raise serializers.ValidationError(
+                'Время готовки не может быть'
+                ' больше 600!')
         return data
 
     def validate_tags(self, data):
-        """Валидатор тегов"""
-        tags = self.initial_data.get('tags')
-        if not tags:
+        """Валидатор тегов: все теги загружаются одним запросом"""
+        if not data:
             raise serializers.ValidationError(
                 'Рецепт не может быть без тегов'
             )
-        for tag_id in tags:
-            if not Tag.objects.filter(id=tag_id).exists():
+        if len(data) != len(set(data)):
+            raise serializers.ValidationError('Теги должны быть уникальными')
+        tags = catalog.tags_in_bulk(data)
+        for tag_id in data:
+            if tag_id not in tags:
                 raise serializers.ValidationError(
                     f'Тег с id = {tag_id} не существует'
                 )
-        tags_bd = set(tags)
-        if len(tags) != len(tags_bd):
-            raise ValidationError('Теги должны быть уникальными')
-        return data
+        return [tags[tag_id] for tag_id in data]
 
     def create_bulk(self, recipe, ingredients_data):
         """Метод работы bulk_create для создания
@@ -138,17 +142,76 @@ class AddRecipeSerializer(serializers.ModelSerializer):
             amount=ingredient['amount']
         ) for ingredient in ingredients_data])
 
+    def update_ingredients(self, recipe, ingredients_data):
+        """Применяет к ингредиентам рецепта только
+        необходимые вставки, изменения и удаления"""
+        current = {
+            recipe_ingredient.ingredient_id: recipe_ingredient
+            for recipe_ingredient in RecipeIngredient.objects.filter(
+                recipe=recipe)
+        }
+        new_amounts = {
+            ingredient['ingredient'].id: ingredient['amount']
+            for ingredient in ingredients_data
+        }
+        change_recipe_in_shopping_lists(recipe, {
+            ingredient_id: recipe_ingredient.amount
+            for ingredient_id, recipe_ingredient in current.items()
+        }, new_amounts)
+        RecipeIngredient.objects.filter(pk__in=[
+            recipe_ingredient.pk
+            for ingredient_id, recipe_ingredient in current.items()
+            if ingredient_id not in new_amounts
+        ]).delete()
+        changed = []
+        for ingredient_id, amount in new_amounts.items():
+            recipe_ingredient = current.get(ingredient_id)
+            if recipe_ingredient and recipe_ingredient.amount != amount:
+                recipe_ingredient.amount = amount
+                changed.append(recipe_ingredient)
+        RecipeIngredient.objects.bulk_update(changed, ('amount',))
+        self.create_bulk(recipe, [
+            ingredient for ingredient in ingredients_data
+            if ingredient['ingredient'].id not in current
+        ])
+        if set(current) != set(new_amounts):
+            record_ingredient_changes([recipe.pk])
+
+    def update_tags(self, recipe, tags_data):
+        """Применяет к тегам рецепта только
+        необходимые вставки и удаления"""
+        current = set(RecipeTag.objects.filter(
+            recipe=recipe).values_list('tag_id', flat=True))
+        new = {tag.id for tag in tags_data}
+        RecipeTag.objects.filter(
+            recipe=recipe, tag_id__in=current - new).delete()
+        RecipeTag.objects.bulk_create([
+            RecipeTag(recipe=recipe, tag_id=tag_id)
+            for tag_id in new - current
+        ])
+        recipe.tags_mask = get_tags_mask(new)
+
+    @transaction.atomic
     def create(self, validated_data):
         """Метод создания рецепта"""
         author = self.context.get('request').user
         tags_data = validated_data.pop('tags')
         ingredients_data = validated_data.pop('ingredients')
-        recipe = Recipe.objects.create(author=author, **validated_data)
-        recipe.save()
-        recipe.tags.set(tags_data)
+        recipe = Recipe.objects.create(
+            author=author,
+            tags_mask=get_tags_mask(tag.id for tag in tags_data),
+            **validated_data
+        )
+        ImageJob.objects.create(recipe=recipe, image=recipe.image.name)
+        FeedJob.objects.create(recipe=recipe)
+        RecipeTag.objects.bulk_create([
+            RecipeTag(recipe=recipe, tag=tag) for tag in tags_data
+        ])
         self.create_bulk(recipe, ingredients_data)
+        record_ingredient_changes([recipe.pk])
         return recipe
 
+    @transaction.atomic
     def update(self, recipe, validated_data):
         """Метод редактирования рецепта"""
         recipe.name = validated_data.get('name', recipe.name)
@@ -157,68 +220,74 @@ class AddRecipeSerializer(serializers.ModelSerializer):
             'cooking_time', recipe.cooking_time
         )
         recipe.image = validated_data.get('image', recipe.image)
-        if 'ingredients' in self.initial_data:
-            ingredients = validated_data.pop('ingredients')
-            recipe.ingredients.clear()
-            for ingredient in ingredients:
-                RecipeIngredient.objects.create(
-                    recipe=recipe,
-                    ingredient=ingredient['ingredient'],
-                    amount=ingredient['amount'],
-                )
-        if 'tags' in self.initial_data:
-            tags_data = validated_data.pop('tags')
-            recipe.tags.set(tags_data)
-        recipe.save()
+        if 'ingredients' in validated_data:
+            self.update_ingredients(
+                recipe, validated_data.pop('ingredients'))
+        if 'tags' in validated_data:
+            self.update_tags(recipe, validated_data.pop('tags'))
+        recipe.save(update_fields=(
+            'name', 'text', 'cooking_time', 'image', 'tags_mask'))
+        if 'image' in validated_data:
+            ImageJob.objects.create(recipe=recipe, image=recipe.image.name)
         return recipe
 
     def to_representation(self, recipe):
         """Метод представления результатов сериализатора"""
         self.fields.pop('ingredients')
-        self.fields['tags'] = TagSerializer(many=True)
+        self.fields['tags'] = RecipeTagsField()
 
         representation = super().to_representation(recipe)
         representation['ingredients'] = RecipeIngredientSerializer(
             RecipeIngredient.objects.filter(
-                recipe=recipe).all(), many=True).data
+                recipe=recipe).select_related('ingredient'), many=True).data
 
         return representation
 
 
-class ShowRecipeFullSerializer(serializers.ModelSerializer):
+class ShowRecipeFullSerializer(TimedRepresentationMixin,
+                               serializers.ModelSerializer):
     """Сериализатор для рецептов."""
-    tags = TagSerializer(many=True, read_only=True)
+    tags = RecipeTagsField()
     author = CustomUserSerializer(read_only=True)
     ingredients = serializers.SerializerMethodField()
     is_favorited = serializers.SerializerMethodField()
     is_in_shopping_cart = serializers.SerializerMethodField()
+    image_variants = serializers.SerializerMethodField()
 
     class Meta:
         model = Recipe
         fields = ('id', 'tags', 'author', 'ingredients', 'name',
-                  'image', 'text', 'cooking_time', 'is_favorited',
-                  'is_in_shopping_cart')
+                  'image', 'image_variants', 'text', 'cooking_time',
+                  'is_favorited', 'is_in_shopping_cart')
+
+    def get_image_variants(self, obj):
+        """Возвращает адреса уменьшенных копий картинки рецепта."""
+        variants = get_variant_urls(obj)
+        request = self.context.get('request')
+        if variants is None or request is None:
+            return variants
+        return {
+            variant: {
+                extension: request.build_absolute_uri(url)
+                for extension, url in urls.items()
+            }
+            for variant, urls in variants.items()
+        }
 
     def get_ingredients(self, obj):
         """Получает список ингридиентов для рецепта."""
-        ingredients = RecipeIngredient.objects.filter(recipe=obj)
+        ingredients = obj.recipeingredient_set.all()
         return RecipeIngredientSerializer(ingredients, many=True).data
 
     def get_is_favorited(self, obj):
         """Проверяет находится ли рецепт в избранном."""
-        request = self.context.get('request')
-        if request.user.is_anonymous:
-            return False
-        return Favorite.objects.filter(recipe=obj,
-                                       user=request.user).exists()
+        return get_user_relations(
+            self.context.get('request')).is_favorited(obj.id)
 
     def get_is_in_shopping_cart(self, obj):
         """Проверяет находится ли рецепт в продуктовой корзине."""
-        request = self.context.get('request')
-        if request.user.is_anonymous:
-            return False
-        return ShoppingCart.objects.filter(recipe=obj,
-                                           user=request.user).exists()
+        return get_user_relations(
+            self.context.get('request')).is_in_shopping_cart(obj.id)
 
 
 class FavoriteSerializer(serializers.ModelSerializer):
@@ -0,0 +1,166 @@
+import threading
+
+from django.db.models import F
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_delete)
+from django.dispatch import receiver
+from users.models import Subscribe, User
+
+from .caching import bump_recipes_version
+from .catalog import bump_catalog_version
+from .coverage import record_ingredient_changes
+from .models import (Favorite, Ingredient, Recipe, RecipeIngredient, RecipeTag,
+                     ShoppingCart, Tag)
+from .relations import bump_relations_version
+from .utils import (add_to_shopping_list, change_recipe_in_shopping_lists,
+                    get_recipe_amounts, remove_from_shopping_list,
+                    update_tags_mask)
+
+# Рецепты, удаляемые в текущем потоке: их строки корзины удаляются
+# каскадно, а списки покупок уже пересчитаны в recipe_deleting.
+deleting_recipes = threading.local()
+
+RECIPE_COUNTERS = {
+    Favorite: 'favorites_count',
+    ShoppingCart: 'shopping_cart_count',
+}
+
+
+@receiver((post_save, post_delete), sender=Tag)
+@receiver((post_save, post_delete), sender=Ingredient)
+def catalog_changed(**kwargs):
+    """Сбрасывает кэш справочников при изменении тегов и ингредиентов"""
+    bump_catalog_version()
+
+
+@receiver((post_save, post_delete), sender=Recipe)
+@receiver((post_save, post_delete), sender=RecipeIngredient)
+@receiver((post_save, post_delete), sender=RecipeTag)
+@receiver((post_save, post_delete), sender=Tag)
+@receiver((post_save, post_delete), sender=Ingredient)
+def recipes_changed(**kwargs):
+    """Сбрасывает кэш ответов при изменении рецептов"""
+    bump_recipes_version()
+
+
+@receiver((post_save, post_delete), sender=RecipeTag)
+def recipe_tags_changed(instance, **kwargs):
+    """Пересчитывает маску тегов рецепта при изменении RecipeTag
+    по одному (например, из админки)"""
+    update_tags_mask([instance.recipe_id])
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def recipe_tags_set(instance, action, pk_set, model, **kwargs):
+    """Пересчитывает маски тегов при изменении Recipe.tags"""
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if model is Recipe and pk_set:
+        update_tags_mask(pk_set)
+    elif isinstance(instance, Recipe):
+        update_tags_mask([instance.pk])
+
+
+def get_deleting_recipes():
+    if not hasattr(deleting_recipes, 'ids'):
+        deleting_recipes.ids = set()
+    return deleting_recipes.ids
+
+
+@receiver(post_save, sender=ShoppingCart)
+def shopping_cart_added(instance, created, **kwargs):
+    """Добавляет ингредиенты рецепта в список покупок"""
+    if created:
+        add_to_shopping_list(instance.user_id, instance.recipe_id)
+
+
+@receiver(post_delete, sender=ShoppingCart)
+def shopping_cart_removed(instance, **kwargs):
+    """Убирает ингредиенты рецепта из списка покупок, кроме
+    каскадного удаления вместе с рецептом"""
+    if instance.recipe_id not in get_deleting_recipes():
+        remove_from_shopping_list(instance.user_id, instance.recipe_id)
+
+
+@receiver(pre_delete, sender=Recipe)
+def recipe_deleting(instance, **kwargs):
+    """Убирает ингредиенты удаляемого рецепта из всех списков покупок,
+    пока строки RecipeIngredient еще не удалены каскадно"""
+    change_recipe_in_shopping_lists(
+        instance, get_recipe_amounts(instance.pk), {})
+    get_deleting_recipes().add(instance.pk)
+
+
+@receiver(post_delete, sender=Recipe)
+def recipe_deleted(instance, **kwargs):
+    get_deleting_recipes().discard(instance.pk)
+
+
+def change_counter(model, pk, field, delta):
+    """Атомарно изменяет счетчик field объекта модели model"""
+    model.objects.filter(pk=pk).update(**{field: F(field) + delta})
+
+
+@receiver(post_save, sender=Favorite)
+@receiver(post_save, sender=ShoppingCart)
+def recipe_relation_added(sender, instance, created, **kwargs):
+    """Увеличивает счетчик добавлений рецепта в избранное или корзину"""
+    if created:
+        change_counter(
+            Recipe, instance.recipe_id, RECIPE_COUNTERS[sender], 1)
+
+
+@receiver(post_delete, sender=Favorite)
+@receiver(post_delete, sender=ShoppingCart)
+def recipe_relation_removed(sender, instance, **kwargs):
+    """Уменьшает счетчик, если рецепт не удаляется вместе со связью"""
+    if instance.recipe_id not in get_deleting_recipes():
+        change_counter(
+            Recipe, instance.recipe_id, RECIPE_COUNTERS[sender], -1)
+
+
+@receiver((post_save, post_delete), sender=Favorite)
+@receiver((post_save, post_delete), sender=ShoppingCart)
+@receiver((post_save, post_delete), sender=Subscribe)
+def user_relations_changed(instance, **kwargs):
+    """Сбрасывает кэш связей пользователя при любом изменении избранного,
+    корзины и подписок, в том числе каскадном и из админки"""
+    bump_relations_version(instance.user_id)
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_created(instance, created, **kwargs):
+    """Увеличивает счетчик рецептов автора"""
+    if created:
+        change_counter(User, instance.author_id, 'recipes_count', 1)
+
+
+@receiver(post_delete, sender=Recipe)
+def recipe_removed(instance, **kwargs):
+    """Уменьшает счетчик рецептов автора"""
+    change_counter(User, instance.author_id, 'recipes_count', -1)
+
+
+@receiver(post_save, sender=Subscribe)
+def subscription_created(instance, created, **kwargs):
+    """Увеличивает счетчик подписчиков автора"""
+    if created:
+        change_counter(User, instance.author_id, 'followers_count', 1)
+
+
+@receiver(post_delete, sender=Subscribe)
+def subscription_removed(instance, **kwargs):
+    """Уменьшает счетчик подписчиков автора"""
+    change_counter(User, instance.author_id, 'followers_count', -1)
+
+
+@receiver((post_save, post_delete), sender=RecipeIngredient)
+def recipe_ingredients_changed(instance, **kwargs):
+    """Записывает изменение состава рецепта в журнал индекса покрытия"""
+    if instance.recipe_id not in get_deleting_recipes():
+        record_ingredient_changes([instance.recipe_id])
+
+
+@receiver(post_delete, sender=Recipe)
+def recipe_ingredients_deleted(instance, **kwargs):
+    record_ingredient_changes([instance.pk])
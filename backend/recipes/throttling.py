@@ -0,0 +1,174 @@
+import random
+import uuid
+from collections import namedtuple
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from rest_framework.throttling import ScopedRateThrottle
+
+COUNTER_KEY = 'load_counter:{}:{}'
+COUNTER_EVENTS = ('accepted', 'throttled', 'shed')
+
+
+def count_event(scope, event):
+    """Увеличивает общий для всех процессов счетчик события"""
+    key = COUNTER_KEY.format(scope, event)
+    cache.add(key, 0, None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, None)
+
+
+def get_counters(scopes):
+    keys = {
+        COUNTER_KEY.format(scope, event): (scope, event)
+        for scope in scopes for event in COUNTER_EVENTS
+    }
+    values = cache.get_many(list(keys))
+    counters = {scope: dict.fromkeys(COUNTER_EVENTS, 0) for scope in scopes}
+    for key, value in values.items():
+        scope, event = keys[key]
+        counters[scope][event] = value
+    return counters
+
+
+class TokenBucketThrottle(ScopedRateThrottle):
+    """Троттлинг по области throttle_scope вьюсета алгоритмом
+    token bucket: ставка N/период задает емкость корзины N
+    и скорость пополнения N за период. Состояние хранится
+    в общем кэше по пользователю или IP"""
+    cache_format = 'throttle_bucket_%(scope)s_%(ident)s'
+
+    def allow_request(self, request, view):
+        self.scope = getattr(view, self.scope_attr, None)
+        if not self.scope:
+            return True
+        self.rate = self.get_rate()
+        self.num_requests, self.duration = self.parse_rate(self.rate)
+        self.key = self.get_cache_key(request, view)
+        now = self.timer()
+        tokens, updated = self.cache.get(self.key, (self.num_requests, now))
+        refill = self.num_requests / self.duration
+        tokens = min(self.num_requests, tokens + (now - updated) * refill)
+        allowed = tokens >= 1
+        if allowed:
+            tokens -= 1
+        self.wait_time = 0 if allowed else (1 - tokens) / refill
+        self.cache.set(self.key, (tokens, now), self.duration)
+        if not allowed:
+            count_event(self.scope, 'throttled')
+        return allowed
+
+    def wait(self):
+        return self.wait_time
+
+
+class ServiceOverloaded(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'Сервер перегружен, повторите запрос позже.'
+    default_code = 'overloaded'
+
+    def __init__(self, wait):
+        super().__init__()
+        self.wait = wait
+
+
+class ReleasingContent:
+    """Потоковое содержимое ответа, которое освобождает место
+    в ConcurrencyLimiter, когда тело отдано целиком, отдача
+    прервалась ошибкой или ответ закрыт"""
+    def __init__(self, content, release):
+        self.content = content
+        self.release = release
+        self.released = False
+
+    def __iter__(self):
+        try:
+            yield from self.content
+        finally:
+            self.close()
+
+    def close(self):
+        if not self.released:
+            self.released = True
+            self.release()
+
+
+class Slot(namedtuple('Slot', ('key', 'token'))):
+    """Занятое место: ключ в кэше и значение, по которому
+    освобождающий запрос узнает свое место"""
+
+
+class ConcurrencyLimiter:
+    """Ограничивает число одновременно выполняемых тяжелых
+    запросов области, лишние получают 503 с Retry-After.
+    Каждое место — отдельный ключ общего кэша со своим сроком
+    жизни, поэтому места процессов, завершившихся не освободив
+    их (например, убитых по таймауту gunicorn), пропадают через
+    LOAD_SHEDDING_SLOT_TIMEOUT независимо от новых запросов"""
+    key_format = 'load_slot:{}:{}'
+
+    def get_keys(self, scope):
+        return [
+            self.key_format.format(scope, number)
+            for number in range(settings.LOAD_SHEDDING_LIMITS[scope])
+        ]
+
+    def acquire(self, scope):
+        """Занимает свободное место области и возвращает его"""
+        keys = self.get_keys(scope)
+        taken = cache.get_many(keys)
+        free = [key for key in keys if key not in taken]
+        # Случайный порядок, чтобы одновременные запросы
+        # реже боролись за один и тот же ключ.
+        random.shuffle(free)
+        token = uuid.uuid4().hex
+        for key in free:
+            if cache.add(key, token, settings.LOAD_SHEDDING_SLOT_TIMEOUT):
+                count_event(scope, 'accepted')
+                return Slot(key, token)
+        count_event(scope, 'shed')
+        raise ServiceOverloaded(settings.LOAD_SHEDDING_RETRY_AFTER)
+
+    def release(self, slot):
+        # Место могло истечь и достаться другому запросу.
+        if cache.get(slot.key) == slot.token:
+            cache.delete(slot.key)
+
+    @contextmanager
+    def slot(self, scope):
+        slot = self.acquire(scope)
+        try:
+            yield
+        finally:
+            self.release(slot)
+
+    def hold(self, slot, response):
+        """Держит место до конца отдачи потокового ответа"""
+        response.streaming_content = ReleasingContent(
+            response.streaming_content, lambda: self.release(slot))
+        return response
+
+    def get_in_flight(self):
+        keys = {
+            scope: self.get_keys(scope)
+            for scope in settings.LOAD_SHEDDING_LIMITS
+        }
+        taken = cache.get_many([key for scope in keys for key in keys[scope]])
+        return {
+            scope: sum(key in taken for key in scope_keys)
+            for scope, scope_keys in keys.items()
+        }
+
+    def get_stats(self):
+        return {
+            'in_flight': self.get_in_flight(),
+            'limits': settings.LOAD_SHEDDING_LIMITS,
+        }
+
+
+limiter = ConcurrencyLimiter()
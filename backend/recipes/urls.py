@@ -1,7 +1,8 @@
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
-from .views import IngredientsViewSet, RecipeViewSet, TagsViewSet
+from .views import (IngredientsViewSet, LoadStatsView, RecipeViewSet,
+                    TagsViewSet)
 
 v1 = DefaultRouter()
 v1.register('recipes', RecipeViewSet, basename='recipes')
@@ -10,5 +11,6 @@ v1.register('tags', TagsViewSet, basename='tags')
 
 
 urlpatterns = [
+    path('load/', LoadStatsView.as_view(), name='load'),
     path('', include(v1.urls)),
 ]
@@ -1,14 +1,213 @@
-from django.http import HttpResponse
+import csv
+import json
+import os
+from collections import Counter, defaultdict
 
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.http import StreamingHttpResponse
+from rest_framework.negotiation import DefaultContentNegotiation
 
-def get_shopping_list(ingredients_list):
-    """Метод для скачивания списка покупок"""
-    buy_list = []
-    for item in ingredients_list:
-        buy_list.append(f'{item["ingredient__name"]} - {item["amount"]} '
-                        f'{item["ingredient__measurement_unit"]} \n')
+from .models import (Recipe, RecipeIngredient, RecipeTag, ShoppingCart,
+                     ShoppingListItem)
+from .pdf import render_pdf
 
-    response = HttpResponse(buy_list, 'Content-Type: text/plain')
+SHOPPING_LIST_CHUNK_SIZE = 2000
+TAGS_MASK_BITS = 63
+
+
+class Echo:
+    """Псевдобуфер, возвращающий записанную строку вместо ее хранения"""
+    def write(self, value):
+        return value
+
+
+def stream_txt(ingredients):
+    """Построчно формирует список покупок в формате txt"""
+    for item in ingredients:
+        yield (f'{item["ingredient__name"]} - {item["amount"]} '
+               f'{item["ingredient__measurement_unit"]} \n')
+
+
+def stream_csv(ingredients):
+    """Построчно формирует список покупок в формате csv"""
+    writer = csv.writer(Echo())
+    yield writer.writerow(('name', 'amount', 'measurement_unit'))
+    for item in ingredients:
+        yield writer.writerow((item['ingredient__name'], item['amount'],
+                               item['ingredient__measurement_unit']))
+
+
+def stream_json(ingredients):
+    """Поэлементно формирует список покупок в формате json"""
+    separator = '['
+    for item in ingredients:
+        yield separator + json.dumps({
+            'name': item['ingredient__name'],
+            'amount': item['amount'],
+            'measurement_unit': item['ingredient__measurement_unit'],
+        }, ensure_ascii=False)
+        separator = ','
+    yield '[]' if separator == '[' else ']'
+
+
+def stream_pdf(ingredients):
+    """Постранично формирует список покупок в формате pdf"""
+    return render_pdf('Список покупок', (
+        f'{item["ingredient__name"]} - {item["amount"]} '
+        f'{item["ingredient__measurement_unit"]}'
+        for item in ingredients
+    ), settings.SHOPPING_LIST_PDF_FONT)
+
+
+SHOPPING_LIST_FORMATS = {
+    'txt': (stream_txt, 'text/plain; charset=utf-8'),
+    'csv': (stream_csv, 'text/csv; charset=utf-8'),
+    'json': (stream_json, 'application/json; charset=utf-8'),
+    'pdf': (stream_pdf, 'application/pdf'),
+}
+
+
+def get_shopping_list_formats():
+    """Доступные форматы выгрузки: pdf — только если есть шрифт"""
+    return [
+        file_format for file_format in SHOPPING_LIST_FORMATS
+        if file_format != 'pdf'
+        or os.path.exists(settings.SHOPPING_LIST_PDF_FONT)
+    ]
+
+
+class ShoppingListContentNegotiation(DefaultContentNegotiation):
+    """Не использует параметр format для выбора рендерера:
+    в выгрузке списка покупок он задает формат файла"""
+    def select_renderer(self, request, renderers, format_suffix=None):
+        return renderers[0], renderers[0].media_type
+
+
+def get_shopping_list(ingredients_list, file_format='txt'):
+    """Метод для потокового скачивания списка покупок"""
+    stream, content_type = SHOPPING_LIST_FORMATS[file_format]
+    response = StreamingHttpResponse(
+        stream(ingredients_list.iterator(
+            chunk_size=SHOPPING_LIST_CHUNK_SIZE)),
+        content_type=content_type
+    )
     response['Content-Disposition'] = ('attachment; '
-                                       'filename="buylist.txt"')
+                                       f'filename="buylist.{file_format}"')
     return response
+
+
+def get_authors_recipes(author_ids, recipes_limit):
+    """Возвращает по recipes_limit последних рецептов для каждого автора
+    одним запросом с оконной функцией ROW_NUMBER."""
+    authors_recipes = {author_id: [] for author_id in author_ids}
+    if not author_ids:
+        return authors_recipes
+    placeholders = ', '.join(['%s'] * len(author_ids))
+    recipes = Recipe.objects.raw(
+        f'SELECT id, author_id, name, image, cooking_time FROM ('
+        f'SELECT id, author_id, name, image, cooking_time, '
+        f'ROW_NUMBER() OVER (PARTITION BY author_id ORDER BY id DESC) '
+        f'AS row_number FROM {Recipe._meta.db_table} '
+        f'WHERE author_id IN ({placeholders})) AS ranked '
+        f'WHERE row_number <= %s ORDER BY author_id, row_number',
+        [*author_ids, recipes_limit]
+    )
+    for recipe in recipes:
+        authors_recipes[recipe.author_id].append(recipe)
+    return authors_recipes
+
+
+def get_tag_bit(tag_id):
+    """Возвращает бит тега в маске рецепта или 0,
+    если id тега не помещается в маску"""
+    if 1 <= tag_id <= TAGS_MASK_BITS:
+        return 1 << (tag_id - 1)
+    return 0
+
+
+def get_tags_mask(tag_ids):
+    mask = 0
+    for tag_id in tag_ids:
+        mask |= get_tag_bit(tag_id)
+    return mask
+
+
+def update_tags_mask(recipe_ids):
+    """Пересчитывает маски тегов рецептов по RecipeTag"""
+    recipe_ids = list(recipe_ids)
+    masks = dict.fromkeys(recipe_ids, 0)
+    for recipe_id, tag_id in RecipeTag.objects.filter(
+            recipe_id__in=recipe_ids).values_list('recipe_id', 'tag_id'):
+        masks[recipe_id] |= get_tag_bit(tag_id)
+    by_mask = defaultdict(list)
+    for recipe_id, mask in masks.items():
+        by_mask[mask].append(recipe_id)
+    for mask, ids in by_mask.items():
+        Recipe.objects.filter(pk__in=ids).update(tags_mask=mask)
+
+
+def get_recipe_amounts(recipe):
+    """Возвращает количество каждого ингредиента в рецепте"""
+    amounts = Counter()
+    for ingredient_id, amount in RecipeIngredient.objects.filter(
+            recipe=recipe).values_list('ingredient_id', 'amount'):
+        amounts[ingredient_id] += amount
+    return amounts
+
+
+def change_shopping_lists(user_ids, deltas):
+    """Изменяет списки покупок пользователей на количества deltas
+    вида {id ингредиента: изменение количества}"""
+    user_ids = list(user_ids)
+    deltas = {
+        ingredient_id: delta
+        for ingredient_id, delta in deltas.items() if delta
+    }
+    if not user_ids or not deltas:
+        return
+    with transaction.atomic():
+        items = ShoppingListItem.objects.filter(user_id__in=user_ids)
+        existing = set(items.filter(
+            ingredient_id__in=deltas
+        ).values_list('user_id', 'ingredient_id'))
+        ingredients_by_delta = defaultdict(list)
+        for ingredient_id, delta in deltas.items():
+            ingredients_by_delta[delta].append(ingredient_id)
+        for delta, ingredient_ids in ingredients_by_delta.items():
+            items.filter(ingredient_id__in=ingredient_ids).update(
+                amount=F('amount') + delta)
+        ShoppingListItem.objects.bulk_create([
+            ShoppingListItem(
+                user_id=user_id, ingredient_id=ingredient_id, amount=delta)
+            for user_id in user_ids
+            for ingredient_id, delta in deltas.items()
+            if delta > 0 and (user_id, ingredient_id) not in existing
+        ])
+        items.filter(amount__lte=0).delete()
+
+
+def add_to_shopping_list(user_id, recipe_id):
+    """Добавляет ингредиенты рецепта в список покупок пользователя"""
+    change_shopping_lists([user_id], get_recipe_amounts(recipe_id))
+
+
+def remove_from_shopping_list(user_id, recipe_id):
+    """Убирает ингредиенты рецепта из списка покупок пользователя"""
+    amounts = get_recipe_amounts(recipe_id)
+    change_shopping_lists([user_id], {
+        ingredient_id: -amount for ingredient_id, amount in amounts.items()
+    })
+
+
+def change_recipe_in_shopping_lists(recipe, old_amounts, new_amounts):
+    """Переносит изменение ингредиентов рецепта в списки покупок
+    пользователей, у которых рецепт лежит в корзине"""
+    deltas = Counter(new_amounts)
+    deltas.subtract(old_amounts)
+    change_shopping_lists(
+        ShoppingCart.objects.filter(recipe=recipe).values_list(
+            'user_id', flat=True),
+        deltas
+    )
@@ -1,29 +1,75 @@
-from django.db.models import Sum
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Prefetch
+from django.http import Http404, HttpResponse, HttpResponseNotModified
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import status, viewsets
 from rest_framework.decorators import action
-from rest_framework.permissions import (IsAuthenticated,
+from rest_framework.permissions import (SAFE_METHODS, IsAuthenticated,
                                         IsAuthenticatedOrReadOnly)
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.views import APIView
 
+from .caching import CachedReadMixin
+from .catalog import catalog
+from .feed import get_feed
 from .filters import IngredientsFilter, RecipeFilter
+from .ingredient_index import ingredient_index
 from .models import (Favorite, Ingredient, Recipe, RecipeIngredient,
-                     ShoppingCart, Tag)
-from .permissions import IsAuthorOrAdmin
+                     ShoppingCart, ShoppingListItem, Tag)
+from .paginator import CustomCursorPaginator
+from .permissions import IsAdmin, IsAuthorOrAdmin
 from .serializers import (AddRecipeSerializer, FavoriteSerializer,
                           IngredientSerializer, ShowRecipeFullSerializer,
                           TagSerializer)
-from .utils import get_shopping_list
+from .throttling import TokenBucketThrottle, get_counters, limiter
+from .utils import (ShoppingListContentNegotiation, get_shopping_list,
+                    get_shopping_list_formats)
 
 
-class RecipeViewSet(viewsets.ModelViewSet):
+class RecipeViewSet(CachedReadMixin, viewsets.ModelViewSet):
     """Вьюсет для модели рецепта"""
     queryset = Recipe.objects.all().order_by("-id")
     filter_backends = (DjangoFilterBackend,)
     filter_class = RecipeFilter
     serializer_class = ShowRecipeFullSerializer
     permission_classes = (IsAuthorOrAdmin,)
+    throttle_classes = (TokenBucketThrottle,)
+    throttle_scopes = {
+        'create': 'recipe_write',
+        'update': 'recipe_write',
+        'partial_update': 'recipe_write',
+        'favorite': 'favorite',
+        'shopping_cart': 'shopping_cart',
+        'download_shopping_cart': 'export',
+    }
+
+    @property
+    def throttle_scope(self):
+        return self.throttle_scopes.get(self.action)
+
+    def create(self, request, *args, **kwargs):
+        with limiter.slot('image_upload'):
+            return super().create(request, *args, **kwargs)
+
+    def update(self, request, *args, **kwargs):
+        if 'image' not in request.data:
+            return super().update(request, *args, **kwargs)
+        with limiter.slot('image_upload'):
+            return super().update(request, *args, **kwargs)
+
+    def get_queryset(self):
+        """Возвращает рецепты с автором, тегами и ингредиентами.
+        Флаги текущего пользователя берутся из кэша его связей."""
+        return Recipe.objects.select_related('author').prefetch_related(
+            'recipe_tag',
+            Prefetch(
+                'recipeingredient_set',
+                queryset=RecipeIngredient.objects.select_related('ingredient')
+            ),
+        ).order_by('-id')
 
     def get_serializer_class(self):
         """Метод выбора сериализатора в зависимости от запроса."""
@@ -38,16 +84,17 @@ class RecipeViewSet(viewsets.ModelViewSet):
                 'errors': 'Рецепт уже добавлен в список'
             }, status=status.HTTP_400_BAD_REQUEST)
         recipe = get_object_or_404(Recipe, id=pk)
-        model.objects.create(user=user, recipe=recipe)
+        with transaction.atomic():
+            model.objects.create(user=user, recipe=recipe)
         serializer = FavoriteSerializer(recipe)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
     def delete_recipe(self, model, user, pk):
         """Метод для удаления"""
         obj = model.objects.filter(user=user, recipe__id=pk)
-        if obj.exists():
-            obj.delete()
-            return Response(status=status.HTTP_204_NO_CONTENT)
+        with transaction.atomic():
+            if obj.delete()[0]:
+                return Response(status=status.HTTP_204_NO_CONTENT)
         return Response({
             'errors': 'Рецепт уже удален'
         }, status=status.HTTP_400_BAD_REQUEST)
@@ -78,22 +125,50 @@ class RecipeViewSet(viewsets.ModelViewSet):
         else:
             return self.delete_recipe(ShoppingCart, request.user, pk)
 
+    @action(
+        detail=False,
+        methods=["GET"],
+        permission_classes=[IsAuthenticated],
+        pagination_class=CustomCursorPaginator,
+    )
+    def feed(self, request):
+        """Лента последних рецептов авторов из подписок"""
+        queryset = get_feed(
+            self.filter_queryset(self.get_queryset()), request.user)
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
     @action(
         detail=False,
         methods=["GET"],
         permission_classes=[IsAuthenticated],
         url_path="download_shopping_cart",
+        content_negotiation_class=ShoppingListContentNegotiation,
     )
     def download_shopping_cart(self, request):
         """Метод для получения и скачивания
         списка продуктов из продуктовой корзины"""
-        ingredients_list = RecipeIngredient.objects.filter(
-            recipe__shopping_cart__user=request.user
+        file_format = request.query_params.get('format', 'txt')
+        formats = get_shopping_list_formats()
+        if file_format not in formats:
+            return Response({
+                'errors': f'Доступные форматы: {", ".join(formats)}'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        ingredients_list = ShoppingListItem.objects.filter(
+            user=request.user
         ).values(
             "ingredient__name",
-            "ingredient__measurement_unit"
-        ).annotate(amount=Sum("amount"))
-        return get_shopping_list(ingredients_list)
+            "ingredient__measurement_unit",
+            "amount"
+        ).order_by("ingredient__name")
+        slot = limiter.acquire('export')
+        try:
+            response = get_shopping_list(ingredients_list, file_format)
+        except Exception:
+            limiter.release(slot)
+            raise
+        return limiter.hold(slot, response)
 
 
 class IngredientsViewSet(viewsets.ModelViewSet):
@@ -106,10 +181,64 @@ class IngredientsViewSet(viewsets.ModelViewSet):
     filterset_class = IngredientsFilter
     search_fields = ("^name",)
 
+    def list(self, request, *args, **kwargs):
+        """Отдает ингредиенты из индекса по префиксу названия"""
+        name = request.query_params.get('name')
+        result = ingredient_index.search(
+            name or '',
+            settings.INGREDIENTS_SEARCH_LIMIT if name else None
+        )
+        if result.etag in request.META.get('HTTP_IF_NONE_MATCH', ''):
+            response = HttpResponseNotModified()
+        elif 'gzip' in request.META.get('HTTP_ACCEPT_ENCODING', ''):
+            response = HttpResponse(
+                result.gzip_content, content_type='application/json')
+            response['Content-Encoding'] = 'gzip'
+        else:
+            response = HttpResponse(
+                result.content, content_type='application/json')
+        response['ETag'] = result.etag
+        response['Vary'] = 'Accept-Encoding'
+        return response
 
-class TagsViewSet(viewsets.ModelViewSet):
+
+class TagsViewSet(CachedReadMixin, viewsets.ModelViewSet):
     """Вьюсет для модели тега"""
     pagination_class = None
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
     permission_classes = (IsAuthenticatedOrReadOnly,)
+
+    def list(self, request, *args, **kwargs):
+        """Отдает теги из кэша справочников"""
+        serializer = self.get_serializer(catalog.get_tags(), many=True)
+        return Response(serializer.data)
+
+    def get_object(self):
+        """Для чтения берет тег из кэша справочников"""
+        if self.request.method not in SAFE_METHODS:
+            return super().get_object()
+        try:
+            tag = catalog.get_tag(int(self.kwargs['pk']))
+        except ValueError:
+            tag = None
+        if tag is None:
+            raise Http404
+        self.check_object_permissions(self.request, tag)
+        return tag
+
+
+class LoadStatsView(APIView):
+    """Счетчики троттлинга и сброса нагрузки"""
+    permission_classes = (IsAdmin,)
+
+    def get(self, request):
+        scopes = sorted(
+            set(api_settings.DEFAULT_THROTTLE_RATES)
+            | set(settings.LOAD_SHEDDING_LIMITS)
+        )
+        return Response({
+            **limiter.get_stats(),
+            'rates': api_settings.DEFAULT_THROTTLE_RATES,
+            'counters': get_counters(scopes),
+        })
@@ -0,0 +1,86 @@
+from django.core.cache import caches
+from django.test import TestCase, TransactionTestCase, override_settings
+from recipes.catalog import catalog
+from recipes.coverage import coverage_index
+from recipes.models import Ingredient, Recipe, RecipeIngredient, Tag
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from users.authentication import token_cache
+from users.models import User
+
+LOCMEM_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'tests-default',
+    },
+    'versions': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'tests-versions',
+    },
+}
+
+
+class FoodgramTestMixin:
+    """Тест с пустыми кэшами: TestCase не выполняет on_commit,
+    поэтому кэши и индексы процесса сбрасываются перед каждым тестом"""
+
+    def setUp(self):
+        for alias in LOCMEM_CACHES:
+            caches[alias].clear()
+        catalog.invalidate()
+        coverage_index.version = None
+        token_cache.entries.clear()
+
+    @staticmethod
+    def create_user(number):
+        return User.objects.create_user(
+            username=f'user{number}', email=f'user{number}@example.com',
+            password='password', first_name='Имя', last_name='Фамилия')
+
+    @staticmethod
+    def create_tags(count):
+        return [
+            Tag.objects.create(
+                name=f'Тег {number}', color=f'#0000{number:02d}',
+                slug=f'tag{number}')
+            for number in range(count)
+        ]
+
+    @staticmethod
+    def create_recipes(authors, tags, count):
+        ingredients = [
+            Ingredient.objects.create(
+                name=f'Ингредиент {number}', measurement_unit='г')
+            for number in range(4)
+        ]
+        recipes = []
+        for number in range(count):
+            recipe = Recipe.objects.create(
+                author=authors[number % len(authors)], name=f'Рецепт {number}',
+                image='recipes/image.png', text='Описание', cooking_time=10)
+            recipe.tags.set(tags[:1 + number % len(tags)])
+            RecipeIngredient.objects.bulk_create([
+                RecipeIngredient(
+                    recipe=recipe, ingredient=ingredient, amount=number + 1)
+                for ingredient in ingredients[:1 + number % 3]
+            ])
+            recipes.append(recipe)
+        return recipes
+
+    @staticmethod
+    def get_client(user=None):
+        client = APIClient()
+        if user is not None:
+            token, _ = Token.objects.get_or_create(user=user)
+            client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        return client
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class FoodgramTestCase(FoodgramTestMixin, TestCase):
+    pass
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class FoodgramTransactionTestCase(FoodgramTestMixin, TransactionTestCase):
+    """Тест, в котором выполняются обработчики on_commit"""
@@ -0,0 +1,45 @@
+from io import StringIO
+
+from django.core.management import call_command
+from recipes.models import Favorite, ShoppingCart
+from users.models import Subscribe
+
+from .base import FoodgramTestCase
+
+
+class CountersTest(FoodgramTestCase):
+    """Счетчики избранного, корзины, рецептов и подписчиков автора
+    не расходятся с данными при изменениях через API и ORM"""
+
+    def setUp(self):
+        super().setUp()
+        self.users = [self.create_user(number) for number in range(3)]
+        tags = self.create_tags(2)
+        self.recipes = self.create_recipes(self.users, tags, 6)
+
+    def assert_no_drift(self):
+        out = StringIO()
+        call_command('reconcile_counters', '--verify', stdout=out)
+        self.assertEqual(out.getvalue().count(': 0 drifted'), 4)
+
+    def test_counters(self):
+        self.assert_no_drift()
+        client = self.get_client(self.users[0])
+        for recipe in self.recipes[:3]:
+            client.post(f'/api/recipes/{recipe.pk}/favorite/')
+            client.post(f'/api/recipes/{recipe.pk}/shopping_cart/')
+        Favorite.objects.create(user=self.users[1], recipe=self.recipes[0])
+        ShoppingCart.objects.create(user=self.users[1], recipe=self.recipes[0])
+        for author in self.users[1:]:
+            client.post(f'/api/users/{author.pk}/subscribe/')
+        Subscribe.objects.create(user=self.users[2], author=self.users[1])
+        Subscribe.objects.create(user=self.users[1], author=self.users[2])
+        self.assert_no_drift()
+        client.delete(f'/api/recipes/{self.recipes[1].pk}/favorite/')
+        Favorite.objects.filter(recipe=self.recipes[0]).delete()
+        ShoppingCart.objects.filter(user=self.users[1]).delete()
+        client.delete(f'/api/users/{self.users[2].pk}/subscribe/')
+        self.assert_no_drift()
+        self.recipes[2].delete()
+        self.users[1].delete()
+        self.assert_no_drift()
@@ -0,0 +1,109 @@
+from unittest import mock
+
+from django.core.cache import caches
+from django.db.models import Q
+from recipes.coverage import (COVERAGE_CHANGE_KEY, IngredientCoverageIndex,
+                              get_coverage_version, reset_coverage,
+                              write_coverage_change)
+from recipes.models import Ingredient, RecipeIngredient
+
+from .base import FoodgramTestCase
+
+
+class CoverageIndexTest(FoodgramTestCase):
+    """Индекс покрытия обновляется по журналу изменений так же,
+    как при полной перестройке, и перестраивается, если журнал
+    применить нельзя"""
+
+    def setUp(self):
+        super().setUp()
+        self.user = self.create_user(0)
+        self.recipes = self.create_recipes(
+            [self.user], self.create_tags(1), 6)
+        self.ids = [recipe.id for recipe in self.recipes]
+        self.index = IngredientCoverageIndex()
+        self.index.refresh()
+
+    def get_state(self, index):
+        postings, ingredients = index.state
+        return ({key: list(value) for key, value in postings.items()},
+                {key: list(value) for key, value in ingredients.items()})
+
+    def test_get_changes_reads_log(self):
+        write_coverage_change(self.ids[:2])
+        write_coverage_change(self.ids[1:3])
+        self.assertEqual(
+            self.index.get_changes(get_coverage_version()),
+            set(self.ids[:3]))
+
+    def test_get_changes_requires_full_log(self):
+        write_coverage_change(self.ids[:1])
+        write_coverage_change(self.ids[1:2])
+        generation, counter = get_coverage_version()
+        with mock.patch('recipes.coverage.COVERAGE_MAX_CHANGES', 1):
+            self.assertIsNone(
+                self.index.get_changes((generation, counter)))
+        caches['versions'].delete(
+            COVERAGE_CHANGE_KEY.format(generation, counter))
+        self.assertIsNone(self.index.get_changes((generation, counter)))
+        self.assertIsNone(self.index.get_changes(reset_coverage()))
+
+    def test_get_changes_without_index(self):
+        self.assertIsNone(
+            IngredientCoverageIndex().get_changes(get_coverage_version()))
+
+    def test_apply_matches_build(self):
+        first, second, third = self.recipes[:3]
+        extra = Ingredient.objects.create(name='Новый', measurement_unit='г')
+        # Изменения мимо сигналов: индекс узнает о них только из apply.
+        RecipeIngredient.objects.filter(recipe=first).update(ingredient=extra)
+        RecipeIngredient.objects.filter(recipe=second).delete()
+        RecipeIngredient.objects.filter(
+            Q(recipe=third) & ~Q(ingredient=extra)).first().delete()
+        self.index.apply({first.id, second.id, third.id})
+        rebuilt = IngredientCoverageIndex()
+        rebuilt.build()
+        self.assertEqual(self.get_state(self.index), self.get_state(rebuilt))
+
+
+class CoverageFilterTest(FoodgramTestCase):
+    """Подбор по ингредиентам сортирует рецепты по покрытию
+    на любой странице и не теряет порядок с параметром cursor"""
+
+    def setUp(self):
+        super().setUp()
+        self.user = self.create_user(0)
+        self.recipes = self.create_recipes(
+            [self.user], self.create_tags(1), 6)
+        self.ingredient = Ingredient.objects.get(name='Ингредиент 0')
+        self.client = self.get_client(self.user)
+        # Сначала рецепты только из этого ингредиента, затем
+        # с наименьшим числом недостающих, при равенстве новые.
+        self.expected = [recipe.id for recipe in sorted(
+            self.recipes, key=lambda recipe: (
+                recipe.ingredients.count(), -recipe.id))]
+
+    def get_ids(self, query):
+        response = self.client.get(
+            f'/api/recipes/?ingredients={self.ingredient.id}&{query}')
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_pages_follow_coverage(self):
+        ids = []
+        for page in (1, 2, 3):
+            data = self.get_ids(f'limit=2&page={page}')
+            self.assertEqual(data['count'], len(self.recipes))
+            ids += [recipe['id'] for recipe in data['results']]
+        self.assertEqual(ids, self.expected)
+
+    def test_cursor_falls_back_to_pages(self):
+        data = self.get_ids('limit=3&cursor=')
+        self.assertEqual(
+            [recipe['id'] for recipe in data['results']], self.expected[:3])
+        self.assertEqual(data['count'], len(self.recipes))
+
+    def test_other_filters_apply(self):
+        data = self.get_ids(f'limit=6&author={self.create_user(1).id}')
+        self.assertEqual(data['count'], 0)
+        self.assertEqual(data['results'], [])
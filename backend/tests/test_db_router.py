@@ -0,0 +1,105 @@
+from unittest import skipIf
+
+from django.conf import settings
+from django.core.management import call_command
+from django.db import connections, router
+from django.http import HttpResponse
+from django.test import RequestFactory, override_settings
+from foodgram.db_router import (PRIMARY, REPLICA, STICKY_COOKIE,
+                                ReplicaMiddleware)
+from recipes.models import Recipe
+
+from .base import FoodgramTestCase
+
+
+@skipIf(REPLICA in settings.DATABASES,
+        'Тесты подключают собственную реплику')
+class ReplicaRouterTest(FoodgramTestCase):
+    """Безопасные запросы читают с реплики, запись и запросы клиента
+    в течение REPLICA_STICKY_SECONDS после нее — с основной БД.
+    Реплика — отдельная база SQLite в памяти, а не зеркало default,
+    поэтому видно, из какой базы прочитаны данные"""
+    databases = {PRIMARY, REPLICA}
+
+    @classmethod
+    def setUpClass(cls):
+        connections.databases[REPLICA] = {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': ':memory:',
+        }
+        # Роутер не дает мигрировать реплику: схему создаем без него.
+        with override_settings(DATABASE_ROUTERS=[]):
+            call_command('migrate', database=REPLICA, verbosity=0)
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        del connections[REPLICA]
+        del connections.databases[REPLICA]
+
+    def setUp(self):
+        super().setUp()
+        self.factory = RequestFactory()
+        self.used = []
+
+    def view(self, request):
+        """Читает, пишет и снова читает, запоминая базы чтения"""
+        self.used.append(router.db_for_read(Recipe))
+        if request.GET.get('write'):
+            router.db_for_write(Recipe)
+            self.used.append(router.db_for_read(Recipe))
+        return HttpResponse()
+
+    def call(self, request):
+        self.used = []
+        response = ReplicaMiddleware(self.view)(request)
+        return response, self.used
+
+    def test_safe_request_reads_replica(self):
+        user = self.create_user(0)
+        self.create_recipes([user], self.create_tags(1), 2)
+        response = self.get_client(user).get('/api/recipes/')
+        self.assertEqual(response.status_code, 200)
+        # Рецепты есть только в основной БД.
+        self.assertEqual(response.json()['count'], 0)
+        self.assertEqual(
+            self.call(self.factory.get('/'))[1], [REPLICA])
+        self.assertEqual(
+            self.call(self.factory.post('/'))[1], [PRIMARY])
+
+    def test_write_pins_request_to_primary(self):
+        _, used = self.call(self.factory.get('/', {'write': 1}))
+        self.assertEqual(used, [REPLICA, PRIMARY])
+
+    def test_cookie_sticks_to_primary(self):
+        response, _ = self.call(self.factory.post('/'))
+        cookie = response.cookies[STICKY_COOKIE]
+        request = self.factory.get('/')
+        request.COOKIES[STICKY_COOKIE] = cookie.value
+        self.assertEqual(self.call(request)[1], [PRIMARY])
+        request = self.factory.get('/')
+        request.COOKIES[STICKY_COOKIE] = '0'
+        self.assertEqual(self.call(request)[1], [REPLICA])
+
+    def test_authorization_sticks_to_primary(self):
+        response, _ = self.call(self.factory.post(
+            '/', HTTP_AUTHORIZATION='Token first'))
+        self.assertIn(STICKY_COOKIE, response.cookies)
+        # Клиент без cookie, например мобильное приложение.
+        _, used = self.call(self.factory.get(
+            '/', HTTP_AUTHORIZATION='Token first'))
+        self.assertEqual(used, [PRIMARY])
+        _, used = self.call(self.factory.get(
+            '/', HTTP_AUTHORIZATION='Token second'))
+        self.assertEqual(used, [REPLICA])
+
+    def test_failed_write_does_not_stick(self):
+        def view(request):
+            return HttpResponse(status=400)
+        response = ReplicaMiddleware(view)(self.factory.post(
+            '/', HTTP_AUTHORIZATION='Token first'))
+        self.assertNotIn(STICKY_COOKIE, response.cookies)
+        _, used = self.call(self.factory.get(
+            '/', HTTP_AUTHORIZATION='Token first'))
+        self.assertEqual(used, [REPLICA])
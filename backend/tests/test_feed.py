@@ -0,0 +1,71 @@
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from recipes.feed import fan_out
+from recipes.models import FeedItem, Recipe
+from users.models import Subscribe
+
+from .base import FoodgramTestCase
+
+
+@override_settings(FEED_FANOUT_MAX_FOLLOWERS=1)
+class FeedTest(FoodgramTestCase):
+    """Рассылка рецепта по лентам решается один раз при публикации
+    по счетчику подписчиков, чтение ленты его не пересчитывает"""
+
+    def setUp(self):
+        super().setUp()
+        self.author = self.create_user(0)
+        self.followers = [self.create_user(number) for number in (1, 2)]
+        self.tags = self.create_tags(1)
+
+    def subscribe(self, *followers):
+        for follower in followers:
+            Subscribe.objects.create(user=follower, author=self.author)
+
+    def publish(self):
+        recipe = self.create_recipes([self.author], self.tags, 1)[0]
+        fan_out(Recipe.objects.get(pk=recipe.pk))
+        recipe.refresh_from_db()
+        return recipe
+
+    def get_feed_ids(self, user):
+        response = self.get_client(user).get('/api/recipes/feed/')
+        self.assertEqual(response.status_code, 200)
+        return [recipe['id'] for recipe in response.json()['results']]
+
+    def test_followers_count(self):
+        self.subscribe(*self.followers)
+        self.author.refresh_from_db()
+        self.assertEqual(self.author.followers_count, 2)
+        Subscribe.objects.filter(user=self.followers[0]).delete()
+        self.author.refresh_from_db()
+        self.assertEqual(self.author.followers_count, 1)
+
+    def test_regular_author_fans_out(self):
+        self.subscribe(self.followers[0])
+        recipe = self.publish()
+        self.assertFalse(recipe.fan_out_on_read)
+        self.assertTrue(FeedItem.objects.filter(
+            user=self.followers[0], recipe=recipe).exists())
+        self.assertEqual(self.get_feed_ids(self.followers[0]), [recipe.id])
+
+    def test_hot_author_recipe_stays_in_feed(self):
+        self.subscribe(*self.followers)
+        recipe = self.publish()
+        self.assertTrue(recipe.fan_out_on_read)
+        self.assertFalse(FeedItem.objects.exists())
+        # Автор перестал быть популярным, но рецепт не пропадает.
+        Subscribe.objects.filter(user=self.followers[0]).delete()
+        self.assertEqual(self.get_feed_ids(self.followers[1]), [recipe.id])
+        self.assertEqual(self.get_feed_ids(self.followers[0]), [])
+
+    def test_feed_does_not_count_followers(self):
+        self.subscribe(*self.followers)
+        self.publish()
+        client = self.get_client(self.followers[1])
+        client.get('/api/recipes/feed/')
+        with CaptureQueriesContext(connection) as queries:
+            client.get('/api/recipes/feed/')
+        self.assertFalse(any(
+            'COUNT(' in query['sql'] for query in queries.captured_queries))
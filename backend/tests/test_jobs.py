@@ -0,0 +1,47 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.utils import timezone
+from recipes.models import FeedJob
+
+from .base import FoodgramTestCase
+
+
+class JobWorkerTest(FoodgramTestCase):
+    """Упавшая задача возвращается в очередь с задержкой,
+    а после последней попытки помечается как FAILED"""
+
+    def setUp(self):
+        super().setUp()
+        recipe = self.create_recipes(
+            [self.create_user(0)], self.create_tags(1), 1)[0]
+        self.job = FeedJob.objects.create(recipe=recipe)
+
+    def run_worker(self):
+        call_command(
+            'process_feed', '--once', stdout=StringIO(), stderr=StringIO())
+        self.job.refresh_from_db()
+
+    @mock.patch('recipes.management.commands.process_feed.fan_out',
+                side_effect=RuntimeError('boom'))
+    def test_failed_job_backs_off(self, fan_out):
+        self.run_worker()
+        self.assertEqual(self.job.status, FeedJob.PENDING)
+        self.assertEqual(self.job.attempts, 1)
+        self.assertGreater(self.job.available_at, timezone.now())
+        self.run_worker()
+        self.assertEqual(fan_out.call_count, 1)
+        for attempts in (2, 3):
+            FeedJob.objects.filter(pk=self.job.pk).update(
+                available_at=timezone.now() - timedelta(seconds=1))
+            self.run_worker()
+            self.assertEqual(self.job.attempts, attempts)
+        self.assertEqual(self.job.status, FeedJob.FAILED)
+        self.assertIn('boom', self.job.error)
+
+    def test_job_done(self):
+        self.run_worker()
+        self.assertEqual(self.job.status, FeedJob.DONE)
+        self.assertEqual(self.job.attempts, 1)
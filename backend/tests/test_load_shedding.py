@@ -0,0 +1,35 @@
+from django.core.cache import cache
+from django.test import override_settings
+from recipes.throttling import ServiceOverloaded, limiter
+
+from .base import FoodgramTestCase
+
+
+@override_settings(LOAD_SHEDDING_LIMITS={'export': 2})
+class ConcurrencyLimiterTest(FoodgramTestCase):
+    """Места ограничителя истекают по отдельности
+    и освобождаются только своим владельцем"""
+
+    def test_limit_and_release(self):
+        first = limiter.acquire('export')
+        limiter.acquire('export')
+        with self.assertRaises(ServiceOverloaded):
+            limiter.acquire('export')
+        self.assertEqual(limiter.get_in_flight(), {'export': 2})
+        limiter.release(first)
+        limiter.acquire('export')
+
+    def test_lost_slot_expires_alone(self):
+        lost = limiter.acquire('export')
+        limiter.acquire('export')
+        # Процесс убит, не освободив место: его ключ истекает,
+        # а место живого запроса остается занятым.
+        cache.delete(lost.key)
+        self.assertEqual(limiter.get_in_flight(), {'export': 1})
+        taken = limiter.acquire('export')
+        with self.assertRaises(ServiceOverloaded):
+            limiter.acquire('export')
+        # Поздний release потерянного места не освобождает чужое.
+        limiter.release(lost)
+        self.assertEqual(cache.get(taken.key), taken.token)
+        self.assertEqual(limiter.get_in_flight(), {'export': 2})
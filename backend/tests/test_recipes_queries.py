@@ -0,0 +1,30 @@
+from .base import FoodgramTestCase
+
+
+class RecipeListQueriesTest(FoodgramTestCase):
+    """Число запросов списка рецептов не зависит от размера страницы"""
+    # Количество, рецепты с авторами, теги и ингредиенты рецептов
+    ANONYMOUS_QUERIES = 4
+    # Токен и связи пользователя после первого запроса берутся из кэшей
+    AUTHENTICATED_QUERIES = 4
+
+    def setUp(self):
+        super().setUp()
+        self.users = [self.create_user(number) for number in range(3)]
+        tags = self.create_tags(3)
+        self.create_recipes(self.users, tags, 12)
+
+    def assert_page_queries(self, client, expected):
+        client.get('/api/recipes/?limit=1')
+        for limit in (2, 6):
+            with self.subTest(limit=limit), self.assertNumQueries(expected):
+                response = client.get(f'/api/recipes/?limit={limit}')
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(response.json()['results']), limit)
+
+    def test_anonymous(self):
+        self.assert_page_queries(self.get_client(), self.ANONYMOUS_QUERIES)
+
+    def test_authenticated(self):
+        self.assert_page_queries(
+            self.get_client(self.users[0]), self.AUTHENTICATED_QUERIES)
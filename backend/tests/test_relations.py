@@ -0,0 +1,47 @@
+from recipes.models import Favorite, ShoppingCart
+from recipes.relations import get_relations_version
+from users.models import Subscribe
+
+from .base import FoodgramTransactionTestCase
+
+
+class UserRelationsTest(FoodgramTransactionTestCase):
+    """Кэш связей пользователя сбрасывается при изменениях
+    в обход API: каскадных удалениях и правках через ORM"""
+
+    def setUp(self):
+        super().setUp()
+        self.user = self.create_user(0)
+        self.author = self.create_user(1)
+        self.recipe = self.create_recipes(
+            [self.author], self.create_tags(1), 1)[0]
+
+    def assert_bumps(self, action):
+        version = get_relations_version(self.user.pk)
+        action()
+        self.assertNotEqual(get_relations_version(self.user.pk), version)
+
+    def test_favorite_and_cart_changes_bump_version(self):
+        for model in (Favorite, ShoppingCart):
+            with self.subTest(model=model.__name__):
+                self.assert_bumps(lambda: model.objects.create(
+                    user=self.user, recipe=self.recipe))
+                self.assert_bumps(lambda: model.objects.filter(
+                    user=self.user).delete())
+
+    def test_subscribe_changes_bump_version(self):
+        self.assert_bumps(lambda: Subscribe.objects.create(
+            user=self.user, author=self.author))
+        self.assert_bumps(lambda: Subscribe.objects.filter(
+            user=self.user).delete())
+
+    def test_recipe_deletion_bumps_version(self):
+        Favorite.objects.create(user=self.user, recipe=self.recipe)
+        self.assert_bumps(self.recipe.delete)
+
+    def test_api_reflects_favorite(self):
+        client = self.get_client(self.user)
+        url = f'/api/recipes/{self.recipe.pk}/'
+        self.assertFalse(client.get(url).json()['is_favorited'])
+        Favorite.objects.create(user=self.user, recipe=self.recipe)
+        self.assertTrue(client.get(url).json()['is_favorited'])
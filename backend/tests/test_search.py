@@ -0,0 +1,48 @@
+from recipes.models import Recipe
+from recipes.paginator import PageNumberOrCursorPaginator
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from .base import FoodgramTestCase
+
+
+class SearchPaginationTest(FoodgramTestCase):
+    """Выдача поиска сохраняет порядок по релевантности
+    и с параметром cursor"""
+
+    def setUp(self):
+        super().setUp()
+        self.user = self.create_user(0)
+        self.recipes = self.create_recipes(
+            [self.user], self.create_tags(1), 4)
+        # Совпадение в названии весит больше, чем в описании.
+        for recipe, name, text in zip(
+                self.recipes,
+                ('Борщ', 'Суп', 'Борщ зеленый', 'Каша'),
+                ('Борщ', 'Почти борщ', 'Щавель', 'Без свеклы')):
+            recipe.name, recipe.text = name, text
+            recipe.save()
+        self.expected = [self.recipes[index].id for index in (0, 2, 1)]
+        self.client = self.get_client()
+
+    def get_ids(self, query):
+        response = self.client.get(f'/api/recipes/?search=борщ&{query}')
+        self.assertEqual(response.status_code, 200)
+        return [recipe['id'] for recipe in response.json()['results']]
+
+    def test_pages_follow_rank(self):
+        self.assertEqual(
+            self.get_ids('limit=2&page=1') + self.get_ids('limit=2&page=2'),
+            self.expected)
+
+    def test_cursor_falls_back_to_pages(self):
+        self.assertEqual(self.get_ids('limit=6&cursor='), self.expected)
+
+    def test_sql_ordering_disables_cursor(self):
+        paginator = PageNumberOrCursorPaginator()
+        request = Request(APIRequestFactory().get('/', {'cursor': ''}))
+        paginator.paginate_queryset(
+            Recipe.objects.order_by('-cooking_time', '-id'), request)
+        self.assertIs(paginator.paginator, paginator.page_number_paginator)
+        paginator.paginate_queryset(Recipe.objects.order_by('-id'), request)
+        self.assertIs(paginator.paginator, paginator.cursor_paginator)
@@ -0,0 +1,96 @@
+import os
+import re
+from collections import Counter
+from unittest import skipUnless
+
+from django.conf import settings
+from django.test import override_settings
+from recipes.models import RecipeIngredient, ShoppingCart, ShoppingListItem
+
+from .base import FoodgramTestCase
+
+
+class ShoppingListTotalsTest(FoodgramTestCase):
+    """Итоги списка покупок совпадают с корзиной при любых
+    изменениях через API, ORM и каскадные удаления"""
+
+    def setUp(self):
+        super().setUp()
+        self.users = [self.create_user(number) for number in range(3)]
+        tags = self.create_tags(2)
+        self.recipes = self.create_recipes(self.users, tags, 6)
+        client = self.get_client(self.users[0])
+        for recipe in self.recipes[:4]:
+            response = client.post(f'/api/recipes/{recipe.pk}/shopping_cart/')
+            self.assertEqual(response.status_code, 201)
+        for recipe in self.recipes[:3]:
+            ShoppingCart.objects.create(user=self.users[1], recipe=recipe)
+
+    def assert_totals(self):
+        expected = Counter()
+        for user_id, ingredient_id, amount in RecipeIngredient.objects.filter(
+                recipe__shopping_cart__isnull=False).values_list(
+                'recipe__shopping_cart__user', 'ingredient', 'amount'):
+            expected[user_id, ingredient_id] += amount
+        actual = {
+            (user_id, ingredient_id): amount
+            for user_id, ingredient_id, amount in
+            ShoppingListItem.objects.values_list(
+                'user', 'ingredient', 'amount')
+        }
+        self.assertEqual(actual, dict(expected))
+
+    def test_cart_changes(self):
+        self.assert_totals()
+        client = self.get_client(self.users[0])
+        client.delete(f'/api/recipes/{self.recipes[0].pk}/shopping_cart/')
+        self.assert_totals()
+        ShoppingCart.objects.filter(
+            user=self.users[1], recipe=self.recipes[1]).delete()
+        self.assert_totals()
+
+    def test_recipe_deletes(self):
+        self.recipes[2].delete()
+        self.assert_totals()
+        author = self.recipes[3].author
+        response = self.get_client(author).delete(
+            f'/api/recipes/{self.recipes[3].pk}/')
+        self.assertEqual(response.status_code, 204)
+        self.assert_totals()
+        self.users[1].delete()
+        self.assert_totals()
+
+
+class ShoppingListPdfTest(FoodgramTestCase):
+    """Выгрузка списка покупок в pdf: корректная таблица xref
+    и отказ, если шрифт для pdf не установлен"""
+
+    def setUp(self):
+        super().setUp()
+        self.user = self.create_user(0)
+        for recipe in self.create_recipes([self.user], self.create_tags(1), 3):
+            ShoppingCart.objects.create(user=self.user, recipe=recipe)
+        self.client = self.get_client(self.user)
+        self.url = '/api/recipes/download_shopping_cart/?format=pdf'
+
+    @skipUnless(os.path.exists(settings.SHOPPING_LIST_PDF_FONT),
+                'Шрифт для pdf не установлен')
+    def test_pdf(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        data = b''.join(response.streaming_content)
+        self.assertTrue(data.startswith(b'%PDF-'))
+        self.assertTrue(data.endswith(b'%%EOF\n'))
+        xref = int(re.search(rb'startxref\n(\d+)', data).group(1))
+        self.assertTrue(data[xref:].startswith(b'xref'))
+        offsets = re.findall(rb'(\d{10}) 00000 n', data[xref:])
+        for number, offset in enumerate(offsets, start=1):
+            self.assertTrue(
+                data[int(offset):].startswith(b'%d 0 obj' % number))
+
+    @override_settings(SHOPPING_LIST_PDF_FONT='/nonexistent.ttf')
+    def test_pdf_without_font(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 400)
+        self.assertNotIn('pdf', response.json()['errors'])
@@ -0,0 +1,44 @@
+from itertools import combinations
+
+from django.test import override_settings
+from recipes.models import Recipe, RecipeTag
+
+from .base import FoodgramTestCase
+
+
+class TagsFilterTest(FoodgramTestCase):
+    """Фильтр по маске тегов совпадает с фильтром через EXISTS
+    и не дублирует рецепты с несколькими подходящими тегами"""
+
+    def setUp(self):
+        super().setUp()
+        self.user = self.create_user(0)
+        self.tags = self.create_tags(4)
+        self.recipes = self.create_recipes([self.user], self.tags[:3], 9)
+        # Теги, измененные мимо сериализатора, тоже попадают в маску.
+        RecipeTag.objects.create(recipe=self.recipes[0], tag=self.tags[3])
+        RecipeTag.objects.filter(
+            recipe=self.recipes[1], tag=self.tags[0]).delete()
+        self.recipes[2].tags.add(self.tags[3])
+        self.client = self.get_client(self.user)
+
+    def get_ids(self, slugs, bitmask):
+        query = ''.join(f'&tags={slug}' for slug in slugs)
+        with override_settings(RECIPE_TAGS_BITMASK=bitmask):
+            response = self.client.get(f'/api/recipes/?limit=50{query}')
+        self.assertEqual(response.status_code, 200)
+        ids = [recipe['id'] for recipe in response.json()['results']]
+        self.assertEqual(len(ids), response.json()['count'])
+        return ids
+
+    def test_mask_matches_exists(self):
+        slugs = [tag.slug for tag in self.tags]
+        for size in range(1, len(slugs) + 1):
+            for subset in combinations(slugs, size):
+                with self.subTest(tags=subset):
+                    mask_ids = self.get_ids(subset, True)
+                    self.assertEqual(mask_ids, self.get_ids(subset, False))
+                    self.assertEqual(len(mask_ids), len(set(mask_ids)))
+                    self.assertEqual(set(mask_ids), set(
+                        Recipe.objects.filter(tags__slug__in=subset)
+                        .values_list('id', flat=True)))
@@ -0,0 +1,57 @@
+from django.db import transaction
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from users.authentication import get_tokens_version, token_cache
+from users.models import User
+
+from .base import FoodgramTransactionTestCase
+
+
+class TokenCacheTest(FoodgramTransactionTestCase):
+    """Кэш токенов не пропускает вышедших пользователей
+    и сразу видит изменение роли"""
+
+    def setUp(self):
+        super().setUp()
+        self.user = self.create_user(0)
+        response = APIClient().post('/api/auth/token/login/', {
+            'email': self.user.email, 'password': 'password'})
+        self.key = response.json()['auth_token']
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.key}')
+
+    def test_cached_token_skips_database(self):
+        self.assertEqual(self.client.get('/api/users/me/').status_code, 200)
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/users/me/')
+        self.assertEqual(response.status_code, 200)
+
+    def test_logout_evicts_token(self):
+        self.assertEqual(self.client.get('/api/users/me/').status_code, 200)
+        response = self.client.post('/api/auth/token/logout/')
+        self.assertEqual(response.status_code, 204)
+        self.assertIsNone(token_cache.get(self.key))
+        self.assertEqual(self.client.get('/api/users/me/').status_code, 401)
+
+    def test_role_change_evicts_token(self):
+        self.assertEqual(self.client.get('/api/load/').status_code, 403)
+        self.user.role = User.ADMIN
+        self.user.save()
+        self.assertEqual(self.client.get('/api/load/').status_code, 200)
+
+    def test_new_user_keeps_cache(self):
+        self.client.get('/api/users/me/')
+        version = get_tokens_version()
+        self.create_user(1)
+        self.assertEqual(get_tokens_version(), version)
+        self.assertIsNotNone(token_cache.get(self.key))
+
+    def test_eviction_waits_for_commit(self):
+        self.client.get('/api/users/me/')
+        version = get_tokens_version()
+        with transaction.atomic():
+            Token.objects.filter(key=self.key).delete()
+            self.assertEqual(get_tokens_version(), version)
+            self.assertIsNotNone(token_cache.get(self.key))
+        self.assertNotEqual(get_tokens_version(), version)
+        self.assertIsNone(token_cache.get(self.key))
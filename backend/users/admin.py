@@ -4,9 +4,19 @@ from .models import Subscribe, User
 
 
 class UserAdmin(admin.ModelAdmin):
-    list_display = ('username', 'email')
-    list_filter = ('username', 'email')
+    list_display = ('username', 'email', 'recipes_count')
+    list_filter = ('role',)
+    search_fields = ('username', 'email')
+    show_full_result_count = False
+
+
+class SubscribeAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'user', 'author')
+    list_select_related = ('user', 'author')
+    autocomplete_fields = ('user', 'author')
+    search_fields = ('user__username', 'author__username')
+    show_full_result_count = False
 
 
 admin.site.register(User, UserAdmin)
-admin.site.register(Subscribe)
+admin.site.register(Subscribe, SubscribeAdmin)
@@ -0,0 +1,102 @@
+import copy
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from foodgram.db_router import primary
+from rest_framework.authentication import TokenAuthentication
+
+TOKENS_VERSION_KEY = 'auth_tokens_version'
+
+
+def get_tokens_version():
+    versions = caches['versions']
+    version = versions.get(TOKENS_VERSION_KEY)
+    if version is None:
+        version = uuid.uuid4().hex
+        if not versions.add(TOKENS_VERSION_KEY, version, None):
+            version = versions.get(TOKENS_VERSION_KEY)
+    return version
+
+
+def bump_tokens_version():
+    """Сбрасывает кэш токенов во всех процессах"""
+    caches['versions'].set(TOKENS_VERSION_KEY, uuid.uuid4().hex, None)
+
+
+class TokenCache:
+    """Ограниченный LRU-кэш токен -> (пользователь, токен) с временем жизни.
+    Сбрасывается целиком при смене версии в общем кэше, которая
+    проверяется не чаще раза в AUTH_TOKEN_CHECK_INTERVAL секунд"""
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+        self.version = None
+        self.checked_at = 0
+
+    def refresh(self):
+        now = time.monotonic()
+        if now - self.checked_at < settings.AUTH_TOKEN_CHECK_INTERVAL:
+            return
+        version = get_tokens_version()
+        with self.lock:
+            if version != self.version:
+                self.entries.clear()
+                self.version = version
+            self.checked_at = now
+
+    def get(self, key):
+        self.refresh()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            expires, user, token = entry
+            if expires < time.monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+        return copy.copy(user), token
+
+    def set(self, key, user, token):
+        with self.lock:
+            self.entries[key] = (
+                time.monotonic() + settings.AUTH_TOKEN_CACHE_TTL,
+                copy.copy(user), token,
+            )
+            self.entries.move_to_end(key)
+            while len(self.entries) > settings.AUTH_TOKEN_CACHE_SIZE:
+                self.entries.popitem(last=False)
+
+    def evict(self, key=None, user_id=None):
+        """Удаляет токен key или все токены пользователя user_id
+        в этом процессе и сбрасывает кэш в остальных после фиксации
+        транзакции: иначе другой процесс успеет снова закэшировать
+        еще не измененную строку"""
+        def evict():
+            with self.lock:
+                for cached_key, (_, user, _) in list(self.entries.items()):
+                    if cached_key == key or user.pk == user_id:
+                        del self.entries[cached_key]
+            bump_tokens_version()
+        transaction.on_commit(evict)
+
+
+token_cache = TokenCache()
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """TokenAuthentication без запроса к БД для недавно
+    проверенных токенов"""
+    def authenticate_credentials(self, key):
+        cached = token_cache.get(key)
+        if cached is not None:
+            return cached
+        with primary():
+            user, token = super().authenticate_credentials(key)
+        token_cache.set(key, user, token)
+        return user, token
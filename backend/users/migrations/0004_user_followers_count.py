@@ -0,0 +1,27 @@
+# Generated by Django 2.2.19 on 2026-10-18 04:59
+
+from django.db import migrations, models
+
+
+def fill_followers_count(apps, schema_editor):
+    User = apps.get_model('users', 'User')
+    User.objects.update(followers_count=models.Subquery(
+        User.objects.filter(pk=models.OuterRef('pk')).annotate(
+            count=models.Count('subscribing')).values('count')
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_user_recipes_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='followers_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Количество подписчиков'),
+        ),
+        migrations.RunPython(fill_followers_count, migrations.RunPython.noop),
+    ]
@@ -29,6 +29,12 @@ class User(AbstractUser):
     email = models.EmailField('E-mail',
                               unique=True,
                               max_length=254)
+    recipes_count = models.PositiveIntegerField('Количество рецептов',
+                                                default=0,
+                                                editable=False)
+    followers_count = models.PositiveIntegerField('Количество подписчиков',
+                                                  default=0,
+                                                  editable=False)
 
     @property
     def is_admin(self):
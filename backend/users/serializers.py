@@ -1,8 +1,9 @@
 from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.shortcuts import get_object_or_404
 from djoser.serializers import UserCreateSerializer, UserSerializer
+from foodgram.instrumentation import TimedRepresentationMixin
 from recipes.models import Recipe
+from recipes.relations import get_user_relations
 from rest_framework import serializers
 
 from .models import Subscribe
@@ -10,6 +11,15 @@ from .models import Subscribe
 User = get_user_model()
 
 
+def get_recipes_limit(request):
+    """Возвращает лимит рецептов автора из параметра recipes_limit"""
+    try:
+        return max(int(request.query_params.get(
+            'recipes_limit', settings.RECIPES_LIMIT)), 0)
+    except ValueError:
+        return settings.RECIPES_LIMIT
+
+
 class UserRegistrationSerializer(UserCreateSerializer):
     """Cериализатор регистрации"""
     class Meta(UserCreateSerializer.Meta):
@@ -29,10 +39,10 @@ class CustomUserSerializer(UserSerializer):
 
     def get_is_subscribed(self, obj):
         """ Метод обработки параметра is_subscribed"""
-        user = self.context.get('request').user
-        if not user or user.is_anonymous:
-            return False
-        return Subscribe.objects.filter(user=user, author=obj).exists()
+        if hasattr(obj, 'is_subscribed'):
+            return obj.is_subscribed
+        return get_user_relations(
+            self.context.get('request')).is_subscribed(obj.id)
 
 
 class SubscribeUserSerializer(serializers.ModelSerializer):
@@ -69,7 +79,8 @@ class SubscribingRecipesSerializers(serializers.ModelSerializer):
         fields = ('id', 'name', 'image', 'cooking_time')
 
 
-class SubscribeViewSerializer(serializers.ModelSerializer):
+class SubscribeViewSerializer(TimedRepresentationMixin,
+                              serializers.ModelSerializer):
     """Сериализатор подписок"""
     is_subscribed = serializers.SerializerMethodField()
     recipes = serializers.SerializerMethodField()
@@ -83,21 +94,20 @@ class SubscribeViewSerializer(serializers.ModelSerializer):
 
     def get_is_subscribed(self, obj):
         """ Метод обработки параметра is_subscribed"""
-        if not self.context.get('request').user.is_authenticated:
-            return False
-        return Subscribe.objects.filter(
-            author=obj, user=self.context['request'].user).exists()
+        if hasattr(obj, 'is_subscribed'):
+            return obj.is_subscribed
+        return get_user_relations(
+            self.context.get('request')).is_subscribed(obj.id)
 
     def get_recipes(self, obj):
         """Метод получения данных рецептов автора"""
-        recipes_limit = int(self.context['request'].GET.get(
-            'recipes_limit', settings.RECIPES_LIMIT))
-        user = get_object_or_404(User, pk=obj.pk)
-        recipes = Recipe.objects.filter(author=user)[:recipes_limit]
-
+        if hasattr(obj, 'recipes_preview'):
+            recipes = obj.recipes_preview
+        else:
+            recipes = obj.user_recipes.order_by('-id')[
+                :get_recipes_limit(self.context['request'])]
         return SubscribingRecipesSerializers(recipes, many=True).data
 
     def get_recipes_count(self, obj):
-        """Метод подсчета количества рецептов автора."""
-        user = get_object_or_404(User, pk=obj.pk)
-        return Recipe.objects.filter(author=user).count()
+        """Метод получения количества рецептов автора."""
+        return obj.recipes_count
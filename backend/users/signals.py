@@ -0,0 +1,24 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from .authentication import token_cache
+from .models import User
+
+
+@receiver(post_delete, sender=Token)
+def token_deleted(instance, **kwargs):
+    """Убирает токен из кэша при выходе из системы"""
+    token_cache.evict(key=instance.key)
+
+
+@receiver(post_save, sender=User)
+def user_saved(instance, created, update_fields=None, **kwargs):
+    """Убирает токены пользователя из кэша при изменении пользователя,
+    в том числе его роли. Новые пользователи и обновление last_login
+    при входе не считаются"""
+    if created:
+        return
+    if update_fields is not None and set(update_fields) == {'last_login'}:
+        return
+    token_cache.evict(user_id=instance.pk)
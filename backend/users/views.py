@@ -1,12 +1,15 @@
 from django.contrib.auth import get_user_model
+from recipes.feed import add_author_to_feed, remove_author_from_feed
+from recipes.paginator import PageNumberOrCursorPaginator
+from recipes.throttling import TokenBucketThrottle
+from recipes.utils import get_authors_recipes
 from rest_framework import generics, permissions, status
 from rest_framework.generics import get_object_or_404
-from rest_framework.pagination import PageNumberPagination
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
 from .models import Subscribe
-from .serializers import SubscribeViewSerializer
+from .serializers import SubscribeViewSerializer, get_recipes_limit
 
 User = get_user_model()
 
@@ -14,6 +17,8 @@ User = get_user_model()
 class SubscribeApiView(APIView):
     """APIView подписки/отписка на автора"""
     permission_classes = [permissions.IsAuthenticated]
+    throttle_classes = [TokenBucketThrottle]
+    throttle_scope = 'subscribe'
 
     def post(self, request, *args, **kwargs):
         """Подписка"""
@@ -22,6 +27,7 @@ class SubscribeApiView(APIView):
         user = request.user
         obj = Subscribe(author=author, user=user)
         obj.save()
+        add_author_to_feed(user, author)
 
         serializer = SubscribeViewSerializer(
             author, context={'request': request})
@@ -36,6 +42,7 @@ class SubscribeApiView(APIView):
             subscription = get_object_or_404(Subscribe, user=user,
                                              author=author)
             subscription.delete()
+            remove_author_from_feed(user, author)
             return Response(status=status.HTTP_204_NO_CONTENT)
         except Subscribe.DoesNotExist:
             return Response(
@@ -49,8 +56,24 @@ class ListSubscribeViewSet(generics.ListAPIView):
     queryset = User.objects.all()
     permission_classes = [permissions.IsAuthenticated]
     serializer_class = SubscribeViewSerializer
-    pagination_class = PageNumberPagination
+    pagination_class = PageNumberOrCursorPaginator
 
     def get_queryset(self):
         user = self.request.user
         return User.objects.filter(subscribing__user=user)
+
+    def paginate_queryset(self, queryset):
+        """Подгружает превью рецептов всех авторов страницы
+        одним запросом. is_subscribed проставляется здесь, а не аннотацией:
+        иначе COUNT пагинатора строится через подзапрос с GROUP BY"""
+        authors = super().paginate_queryset(queryset)
+        if authors is None:
+            return None
+        authors_recipes = get_authors_recipes(
+            [author.id for author in authors],
+            get_recipes_limit(self.request)
+        )
+        for author in authors:
+            author.recipes_preview = authors_recipes[author.id]
+            author.is_subscribed = True
+        return authors